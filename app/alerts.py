@@ -0,0 +1,211 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+
+import numpy as np  # type: ignore
+import pandas as pd  # type: ignore
+import requests  # type: ignore
+
+from ingestion import INGESTAO_DIR
+from quality import DUPLICADO, NIVEL_FORA_DA_FAIXA, chuva_valida, nivel_valido
+
+COLUNA_CARIMBO = 'Carimbo de data/hora'
+COLUNA_NIVEL = 'Nível do Rio (m)'
+COLUNA_CHUVA = 'Chuva (mm)'
+
+# Limites por estação ficam em "ALERTAS" no estacoes.json; null desativa a regra
+REGRAS_PADRAO = {
+    'nivel_maximo': None,
+    'subida_metros': 0.5,
+    'subida_horas': 3,
+    'chuva_mm': 50.0,
+    'chuva_horas': 24
+}
+
+
+def regras_da_estacao(config):
+    regras = dict(REGRAS_PADRAO)
+    desconhecidas = set(config.get('ALERTAS', {})) - set(REGRAS_PADRAO)
+    if desconhecidas:
+        raise ValueError(f"Regras de alerta desconhecidas: {', '.join(sorted(desconhecidas))}")
+    regras.update(config.get('ALERTAS', {}))
+    return regras
+
+
+class AlertLog:
+    # Um evento por linha (JSON lines), anexado ao arquivo
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self._lock = threading.Lock()
+
+    def __call__(self, eventos):
+        if not eventos:
+            return
+        with self._lock:
+            pasta = os.path.dirname(self.caminho)
+            if pasta:
+                os.makedirs(pasta, exist_ok=True)
+            with open(self.caminho, 'a', encoding='utf-8') as f:
+                for evento in eventos:
+                    f.write(json.dumps(evento, ensure_ascii=False) + '\n')
+
+
+class WebhookStub:
+    # POST de cada evento em JSON para um endpoint local; falhas não interrompem a avaliação
+    def __init__(self, url, timeout=5):
+        self.url = url
+        self.timeout = timeout
+
+    def __call__(self, eventos):
+        for evento in eventos:
+            try:
+                requests.post(self.url, json=evento, timeout=self.timeout)
+            except requests.RequestException as e:
+                print(f"Erro ao enviar alerta para {self.url}: {e}", flush=True)
+
+
+def criar_notificadores():
+    # ALERTAS_LOG: arquivo JSON lines (vazio desativa); ALERTAS_WEBHOOK: URL que recebe cada evento
+    notificadores = []
+    caminho_log = os.environ.get("ALERTAS_LOG", os.path.join(INGESTAO_DIR, "alertas.jsonl"))
+    if caminho_log:
+        notificadores.append(AlertLog(caminho_log))
+    if os.environ.get("ALERTAS_WEBHOOK"):
+        notificadores.append(WebhookStub(os.environ["ALERTAS_WEBHOOK"]))
+    return notificadores
+
+
+class AlertEngine:
+    # Avalia as regras só sobre as linhas novas. As janelas móveis são deques: a soma da chuva é
+    # mantida ao entrar e sair cada medição, e o mínimo do nível vem de uma deque monotônica,
+    # então cada medição custa O(1) amortizado, sem reler o histórico.
+    def __init__(self, estacao, regras=None, notificadores=None, historico_max=50):
+        self.estacao = estacao
+        self.regras = dict(REGRAS_PADRAO, **(regras or {}))
+        self.notificadores = notificadores or []
+        self.historico = deque(maxlen=historico_max)
+        self._janela_subida = np.timedelta64(int((self.regras['subida_horas'] or 0) * 3600), 's')
+        self._janela_chuva = np.timedelta64(int((self.regras['chuva_horas'] or 0) * 3600), 's')
+        self._lock = threading.Lock()
+        self.ativos = {}
+        self._reiniciar()
+
+    def _reiniciar(self):
+        # Os alertas ativos são mantidos: ao reaquecer, só mudanças de estado geram eventos
+        self.ultimo_carimbo = None
+        self._linhas = 0
+        self._minimos = deque()
+        self._chuvas = deque()
+        self._chuva_soma = 0.0
+        self._nivel = None
+
+    def avaliar(self, df):
+        # Devolve os eventos novos (alertas ativados e normalizados) e os repassa aos notificadores
+        if df.empty or COLUNA_CARIMBO not in df.columns:
+            return []
+        with self._lock:
+            carimbos = df[COLUNA_CARIMBO].values
+            if self.ultimo_carimbo is not None and carimbos[-1] < self.ultimo_carimbo:
+                # O motor é compartilhado: sessões fora do modo ao vivo ainda trazem o df em cache da
+                # página, mais antigo que o do modo ao vivo. Não há nada novo nele.
+                return []
+            avaliadas = int(np.searchsorted(carimbos, self.ultimo_carimbo, side='right')) if self.ultimo_carimbo is not None else 0
+            if self.ultimo_carimbo is None or avaliadas != self._linhas:
+                # Início, ou histórico editado (outra contagem até o último carimbo avaliado): aquece as
+                # janelas com o trecho final, sem repetir alertas que já estavam ativos
+                self._reiniciar()
+                inicio = int(np.searchsorted(carimbos, carimbos[-1] - max(self._janela_subida, self._janela_chuva), side='left'))
+                aquecendo = True
+            else:
+                inicio = avaliadas
+                aquecendo = False
+
+            # float64 para a soma móvel não acumular erro de arredondamento do float32
+            niveis = df[COLUNA_NIVEL].values[inicio:].astype('float64') if COLUNA_NIVEL in df.columns else np.full(len(carimbos) - inicio, np.nan)
+            chuvas = df[COLUNA_CHUVA].values[inicio:].astype('float64') if COLUNA_CHUVA in df.columns else np.zeros(len(carimbos) - inicio)
+            # Medições fora da faixa ou duplicadas não disparam alertas. Picos não são descartados aqui:
+            # uma subida rápida de cheia não pode esperar a confirmação da medição seguinte
+            recorte = df.iloc[inicio:]
+            niveis[~nivel_valido(recorte, bits=NIVEL_FORA_DA_FAIXA | DUPLICADO).to_numpy()] = np.nan
+            chuvas[~chuva_valida(recorte).to_numpy()] = np.nan
+            eventos = []
+            for carimbo, nivel, chuva in zip(carimbos[inicio:], niveis, chuvas):
+                self._registrar(carimbo, nivel, chuva)
+                if not aquecendo:
+                    eventos += self._verificar(carimbo)
+            if aquecendo and inicio < len(carimbos):
+                eventos += self._verificar(carimbos[-1])
+            self.ultimo_carimbo = carimbos[-1]
+            self._linhas = len(carimbos)
+            self.historico.extend(eventos)
+
+        for notificar in self.notificadores:
+            notificar(eventos)
+        return eventos
+
+    def _registrar(self, carimbo, nivel, chuva):
+        if self._janela_chuva:
+            limite = carimbo - self._janela_chuva
+            while self._chuvas and self._chuvas[0][0] <= limite:
+                self._chuva_soma -= self._chuvas.popleft()[1]
+            if chuva == chuva and chuva > 0:
+                self._chuvas.append((carimbo, chuva))
+                self._chuva_soma += chuva
+
+        # Nível inválido chega como NaN
+        if nivel == nivel:
+            self._nivel = nivel
+            if self._janela_subida:
+                limite = carimbo - self._janela_subida
+                while self._minimos and self._minimos[0][0] < limite:
+                    self._minimos.popleft()
+                while self._minimos and self._minimos[-1][1] >= nivel:
+                    self._minimos.pop()
+                self._minimos.append((carimbo, nivel))
+
+    def _verificar(self, carimbo):
+        regras = self.regras
+        condicoes = {}
+        if regras['nivel_maximo'] is not None and self._nivel is not None:
+            condicoes['nivel_maximo'] = (
+                self._nivel >= regras['nivel_maximo'], self._nivel, regras['nivel_maximo'],
+                f"Nível do rio em {self._nivel:.2f} m (limite {regras['nivel_maximo']:.2f} m)"
+            )
+        if regras['subida_metros'] is not None and regras['subida_horas'] and self._minimos:
+            subida = self._nivel - self._minimos[0][1]
+            condicoes['subida'] = (
+                subida >= regras['subida_metros'], subida, regras['subida_metros'],
+                f"Nível subiu {subida:.2f} m em {regras['subida_horas']} h (limite {regras['subida_metros']:.2f} m)"
+            )
+        if regras['chuva_mm'] is not None and regras['chuva_horas']:
+            condicoes['chuva_acumulada'] = (
+                self._chuva_soma >= regras['chuva_mm'], self._chuva_soma, regras['chuva_mm'],
+                f"Chuva acumulada de {self._chuva_soma:.1f} mm em {regras['chuva_horas']} h (limite {regras['chuva_mm']:.1f} mm)"
+            )
+
+        eventos = []
+        for regra, (ativo, valor, limite, mensagem) in condicoes.items():
+            if ativo == (regra in self.ativos):
+                continue
+            evento = {
+                'estacao': self.estacao,
+                'regra': regra,
+                'estado': 'ativo' if ativo else 'normalizado',
+                'valor': round(float(valor), 3),
+                'limite': limite,
+                'mensagem': mensagem,
+                'carimbo': pd.Timestamp(carimbo).isoformat(),
+                'emitido_em': time.time()
+            }
+            if ativo:
+                self.ativos[regra] = evento
+            else:
+                del self.ativos[regra]
+            eventos.append(evento)
+        return eventos
+
+    def resumo(self):
+        with self._lock:
+            return {'ativos': list(self.ativos.values()), 'historico': list(self.historico)}
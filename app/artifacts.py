@@ -0,0 +1,98 @@
+import json
+import os
+import time
+
+import pandas as pd  # type: ignore
+
+from forecast_cache import fingerprint_serie
+from ingestion import compactar_tipos, gravar_json, gravar_parquet
+from rollups import StationRollup
+
+ARQUIVOS_PREVISAO = {
+    'Chuva (mm)': 'chuva',
+    'Nível do Rio (m)': 'nivel'
+}
+
+
+def diretorio_estacao(base_dir, config):
+    return os.path.join(base_dir, f"{config['SHEET_ID']}_{config['GID']}")
+
+
+def gravar_artefatos(resultado, base_dir, config):
+    destino = diretorio_estacao(base_dir, config)
+    os.makedirs(destino, exist_ok=True)
+    df = resultado['df']
+
+    gravar_parquet(df, os.path.join(destino, 'dados.parquet'), index=False)
+    resultado['rollup'].salvar(os.path.join(destino, 'rollup'))
+
+    previsoes = {}
+    for variavel, nome in ARQUIVOS_PREVISAO.items():
+        serie = resultado['series_mensais'][variavel]
+        gravar_parquet(serie, os.path.join(destino, f'serie_{nome}.parquet'), index=False)
+        forecast = resultado.get('previsoes', {}).get(variavel)
+        if forecast is not None:
+            gravar_parquet(forecast, os.path.join(destino, f'previsao_{nome}.parquet'), index=False)
+            previsoes[variavel] = fingerprint_serie(serie)
+
+    if 'alertas' in resultado:
+        gravar_json(resultado['alertas'], os.path.join(destino, 'alertas.json'))
+
+    manifesto = {
+        'estacao': resultado['estacao'],
+        'gerado_em': time.time(),
+        'linhas': len(df),
+        'ultimo_carimbo': resultado['serie'].fim.isoformat() if len(resultado['serie']) else None,
+        'previsoes': previsoes
+    }
+    # Gravado por último: a página usa a data do manifesto como versão dos artefatos
+    gravar_json(manifesto, os.path.join(destino, 'manifesto.json'))
+    return manifesto
+
+
+def ler_manifesto(base_dir, config):
+    caminho = os.path.join(diretorio_estacao(base_dir, config), 'manifesto.json')
+    if not os.path.exists(caminho):
+        return None
+    with open(caminho, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def ler_dados(base_dir, config):
+    # Artefatos de versões anteriores ainda têm texto e float64
+    return compactar_tipos(pd.read_parquet(os.path.join(diretorio_estacao(base_dir, config), 'dados.parquet'), memory_map=True))
+
+
+def ler_rollup(base_dir, config):
+    return StationRollup.carregar(os.path.join(diretorio_estacao(base_dir, config), 'rollup'))
+
+
+def ler_alertas(base_dir, config):
+    # {'ativos': [...], 'historico': [...]} gravado pelo precompute; None se os alertas não foram avaliados
+    caminho = os.path.join(diretorio_estacao(base_dir, config), 'alertas.json')
+    if not os.path.exists(caminho):
+        return None
+    with open(caminho, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def ler_previsoes(base_dir, config):
+    # Devolve {variavel: (serie mensal, resultado no formato do ForecastStore)}
+    destino = diretorio_estacao(base_dir, config)
+    manifesto = ler_manifesto(base_dir, config) or {}
+    previsoes = {}
+    for variavel, nome in ARQUIVOS_PREVISAO.items():
+        caminho_serie = os.path.join(destino, f'serie_{nome}.parquet')
+        caminho_previsao = os.path.join(destino, f'previsao_{nome}.parquet')
+        if not os.path.exists(caminho_serie):
+            continue
+        serie = pd.read_parquet(caminho_serie)
+        resultado = None
+        if variavel in manifesto.get('previsoes', {}) and os.path.exists(caminho_previsao):
+            resultado = {
+                'forecast': pd.read_parquet(caminho_previsao),
+                'fingerprint': manifesto['previsoes'][variavel],
+                'updated_at': manifesto['gerado_em']
+            }
+        previsoes[variavel] = (serie, resultado)
+    return previsoes
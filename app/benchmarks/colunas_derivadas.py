@@ -0,0 +1,71 @@
+# Compara a derivação antiga (apply por linha e ida e volta por strings) com a da tabela atual (formatar_tabela).
+# Uso, a partir de app/: python -m benchmarks.colunas_derivadas --anos 5
+import argparse
+import time
+
+import numpy as np  # type: ignore
+import pandas as pd  # type: ignore
+
+from functions import formatar_tabela
+
+
+def gerar_carimbos(anos, medicoes_por_dia, seed=0):
+    rng = np.random.default_rng(seed)
+    inicio = pd.Timestamp('2020-01-01')
+    total = int(anos * 365 * medicoes_por_dia)
+    segundos = np.sort(rng.integers(0, int(anos * 365 * 86400), total))
+    return pd.DataFrame({'Carimbo de data/hora': inicio + pd.to_timedelta(segundos, unit='s')})
+
+
+def mes_ano_extenso(mes, ano):
+    # Helper da derivação antiga, mantido aqui só para a comparação
+    meses = ['01', '02', '03', '04', '05', '06', '07', '08', '09', '10', '11', '12']
+    return f'{ano}-{meses[mes - 1]}'
+
+
+def derivacao_antiga(df):
+    df = df.copy()
+    df['DATA'] = df['Carimbo de data/hora'].dt.strftime('%d/%m/%Y')
+    df['HORA'] = df['Carimbo de data/hora'].dt.strftime('%H:%M')
+    df['DATA_ORDENACAO'] = pd.to_datetime(df['DATA'], format='%d/%m/%Y')
+    df['DATA'] = df['DATA_ORDENACAO'].dt.strftime('%d/%m/%Y')
+    df['MES_ANO'] = df.apply(lambda row: mes_ano_extenso(row['Carimbo de data/hora'].month, row['Carimbo de data/hora'].year), axis=1)
+    return df
+
+
+def derivacao_vetorizada(df):
+    return formatar_tabela(df)
+
+
+def cronometrar(funcao, df, repeticoes):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao(df)
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--anos', type=float, default=5)
+    parser.add_argument('--medicoes-por-dia', type=int, default=24)
+    parser.add_argument('--repeticoes', type=int, default=3)
+    args = parser.parse_args()
+
+    df = gerar_carimbos(args.anos, args.medicoes_por_dia)
+    antiga = derivacao_antiga(df)
+    nova = derivacao_vetorizada(df)
+    for coluna in ['DATA', 'HORA', 'MES_ANO']:
+        assert (antiga[coluna].astype(str) == nova[coluna].astype(str)).all(), coluna
+
+    t_antiga = cronometrar(derivacao_antiga, df, args.repeticoes)
+    t_nova = cronometrar(derivacao_vetorizada, df, args.repeticoes)
+    print(f'{len(df)} linhas ({args.anos:g} anos)')
+    print(f'antiga:     {t_antiga * 1000:10.1f} ms')
+    print(f'vetorizada: {t_nova * 1000:10.1f} ms')
+    print(f'speedup:    {t_antiga / t_nova:10.1f}x')
+
+
+if __name__ == '__main__':
+    main()
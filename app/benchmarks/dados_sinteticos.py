@@ -0,0 +1,52 @@
+import numpy as np  # type: ignore
+import pandas as pd  # type: ignore
+
+OPERADORES = ['Ana Souza', 'Bruno Lima', 'Carlos Pereira', 'Daniela Rocha', 'Eduardo Alves', 'Fernanda Costa']
+STATUS_ASSOREAMENTO = ['Normal', 'Moderado', 'Alto']
+STATUS_CAPTACAO = ['Limpo', 'Parcialmente obstruído', 'Obstruído']
+
+
+def _formatar(valores, sufixos, rng):
+    # Reproduz a digitação da planilha: vírgula ou ponto decimal, com ou sem unidade
+    texto = np.char.mod('%.2f', valores)
+    virgula = rng.random(len(valores)) < 0.8
+    texto = np.where(virgula, np.char.replace(texto, '.', ','), texto)
+    texto = np.char.add(texto, rng.choice(sufixos, len(valores)))
+    return np.where(np.isnan(valores), '', texto)
+
+
+def gerar_medicoes(linhas, anos=5, fim=None, seed=0):
+    # Série de nível com sazonalidade anual e resposta à chuva, no formato bruto da planilha
+    rng = np.random.default_rng(seed)
+    fim = pd.Timestamp(fim) if fim is not None else pd.Timestamp.now().floor('min')
+    duracao = int(anos * 365 * 86400)
+    segundos = np.sort(rng.integers(0, duracao, linhas))
+    # Envios repetidos do formulário: mesmo carimbo da linha anterior
+    repetidos = np.flatnonzero(rng.random(linhas - 1) < 0.001) + 1
+    segundos[repetidos] = segundos[repetidos - 1]
+    carimbos = fim - pd.to_timedelta(duracao - segundos, unit='s')
+
+    chuva = np.where(rng.random(linhas) < 0.3, rng.gamma(0.8, 8.0, linhas), 0.0)
+    resposta = np.convolve(chuva, np.exp(-np.arange(48) / 12.0), mode='full')[:linhas] / 40.0
+    dia_do_ano = carimbos.dayofyear.values
+    nivel = 2.0 + 0.6 * np.sin(2 * np.pi * dia_do_ano / 365.25) + resposta + rng.normal(0, 0.05, linhas)
+    nivel = np.round(np.clip(nivel, 0.3, None), 2)
+
+    nivel[rng.random(linhas) < 0.005] = 0.0
+    # Vírgula esquecida na digitação (35 no lugar de 3,5)
+    nivel[rng.random(linhas) < 0.001] *= 10
+    nivel[rng.random(linhas) < 0.01] = np.nan
+    chuva[rng.random(linhas) < 0.02] = np.nan
+
+    return pd.DataFrame({
+        'Carimbo de data/hora': carimbos.strftime('%d/%m/%Y %H:%M:%S'),
+        'NOME': rng.choice(OPERADORES, linhas),
+        'Nível do Rio (m)': _formatar(nivel, ['m', 'm', ' m', ''], rng),
+        'Chuva (mm)': _formatar(np.round(chuva, 1), ['mm', 'mm', ' mm', ''], rng),
+        'Assoreamento [Nova]': rng.choice(STATUS_ASSOREAMENTO, linhas, p=[0.7, 0.2, 0.1]),
+        'Captação [Gradeamento]': rng.choice(STATUS_CAPTACAO, linhas, p=[0.6, 0.3, 0.1])
+    })
+
+
+def gerar_csv(linhas, anos=5, fim=None, seed=0):
+    return gerar_medicoes(linhas, anos=anos, fim=fim, seed=seed).to_csv(index=False).encode('utf-8')
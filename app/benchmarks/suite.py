@@ -0,0 +1,157 @@
+# Mede como carga e processamento escalam com o tamanho da planilha, fora do Streamlit.
+# Uso, a partir de app/:
+#   python -m benchmarks.suite --linhas 1000 10000 100000 --saida resultados.json
+#   python -m benchmarks.suite --linhas 1000 10000 --comparar resultados.json
+import argparse
+import io
+import json
+import platform
+import sys
+import time
+
+import numpy as np  # type: ignore
+import pandas as pd  # type: ignore
+import plotly.graph_objects as go  # type: ignore
+from plotly.subplots import make_subplots  # type: ignore
+
+from benchmarks.dados_sinteticos import gerar_csv
+from downsampling import reduzir_serie
+from functions import formatar_tabela
+from nowcast import NowcastARX
+from ingestion import limpar_dados
+from pipeline import series_mensais
+from quality import marcar_duplicados, marcar_picos, validar
+from rollups import StationRollup
+from time_index import SerieTemporal
+
+ETAPAS = ['parse', 'qualidade', 'tabela', 'filtro', 'agregacao', 'figura', 'nowcast', 'previsao']
+
+
+def _cronometrar(funcao, repeticoes):
+    tempos = []
+    resultado = None
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos), resultado
+
+
+def _figura_detalhada(df, limite):
+    nivel = reduzir_serie(df, 'Carimbo de data/hora', 'Nível do Rio (m)', limite)
+    chuva = reduzir_serie(df, 'Carimbo de data/hora', 'Chuva (mm)', limite)
+    fig = make_subplots(specs=[[{"secondary_y": True}]])
+    fig.add_trace(go.Scatter(x=nivel['Carimbo de data/hora'], y=nivel['Nível do Rio (m)'], mode='lines'), secondary_y=False)
+    fig.add_trace(go.Scatter(x=chuva['Carimbo de data/hora'], y=chuva['Chuva (mm)'], mode='lines'), secondary_y=True)
+    fig.update_xaxes(rangeslider_visible=True)
+    return fig.to_json()
+
+
+def _previsao(rollup):
+    from forecast_cache import ajustar_prophet
+    return ajustar_prophet(series_mensais(rollup)['Nível do Rio (m)'])
+
+
+def executar(linhas, etapas, repeticoes, limite_pontos):
+    bruto = gerar_csv(linhas)
+    resultados = {}
+
+    tempo, df = _cronometrar(lambda: limpar_dados(pd.read_csv(io.BytesIO(bruto), encoding='utf-8')).reset_index(drop=True), repeticoes)
+    resultados['parse'] = tempo
+
+    # Validação completa da carga: regras por linha (validar) e as marcadas sobre o df montado
+    # (duplicados entre lotes e picos); as etapas seguintes recebem a coluna QUALIDADE, como no dashboard
+    tempo, df = _cronometrar(lambda: marcar_picos(marcar_duplicados(validar(df))), repeticoes)
+    resultados['qualidade'] = tempo
+
+    # Colunas de texto da tabela (DATA, HORA, MES_ANO), geradas na exibição
+    tempo, _ = _cronometrar(lambda: formatar_tabela(df), repeticoes)
+    resultados['tabela'] = tempo
+    memoria = int(df.memory_usage(deep=True).sum())
+
+    serie = SerieTemporal(df)
+    fim = serie.fim
+    periodos = [(fim - pd.Timedelta(days=dias), fim) for dias in (1, 7, 30, 365)]
+    tempo, _ = _cronometrar(lambda: [serie.intervalo(inicio, final) for inicio, final in periodos], repeticoes)
+    resultados['filtro'] = tempo
+
+    tempo, rollup = _cronometrar(lambda: StationRollup().atualizar(df), repeticoes)
+    tempo_mensal, _ = _cronometrar(lambda: (rollup.mensal(), rollup.diario_intervalo(*periodos[-1])), repeticoes)
+    resultados['agregacao'] = tempo + tempo_mensal
+
+    ultimo_ano = serie.intervalo(*periodos[-1])
+    tempo, payload = _cronometrar(lambda: _figura_detalhada(ultimo_ano, limite_pontos), repeticoes)
+    resultados['figura'] = tempo
+
+    tempo, _ = _cronometrar(lambda: NowcastARX().atualizar(df).prever(24), repeticoes)
+    resultados['nowcast'] = tempo
+
+    if 'previsao' in etapas:
+        tempo, _ = _cronometrar(lambda: _previsao(rollup), 1)
+        resultados['previsao'] = tempo
+
+    return [
+        {'etapa': etapa, 'linhas': linhas, 'segundos': round(resultados[etapa], 6)}
+        for etapa in etapas if etapa in resultados
+    ] + [
+        {'etapa': 'payload_figura_bytes', 'linhas': linhas, 'valor': len(payload)},
+        {'etapa': 'memoria_bytes', 'linhas': linhas, 'valor': memoria}
+    ]
+
+
+def comparar(atuais, anteriores, tolerancia):
+    referencia = {(r['etapa'], r['linhas']): r for r in anteriores if 'segundos' in r}
+    regressoes = []
+    for resultado in atuais:
+        anterior = referencia.get((resultado['etapa'], resultado['linhas']))
+        if anterior is None or 'segundos' not in resultado or not anterior['segundos']:
+            continue
+        razao = resultado['segundos'] / anterior['segundos']
+        marcador = ' <-- regressão' if razao > 1 + tolerancia else ''
+        print(f"{resultado['etapa']:>10} {resultado['linhas']:>9}  {anterior['segundos'] * 1000:10.2f} ms -> {resultado['segundos'] * 1000:10.2f} ms  ({razao:5.2f}x){marcador}")
+        if marcador:
+            regressoes.append(resultado)
+    return regressoes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do processamento das planilhas das estações")
+    parser.add_argument('--linhas', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--etapas', nargs='+', choices=ETAPAS, default=ETAPAS)
+    parser.add_argument('--repeticoes', type=int, default=3)
+    parser.add_argument('--pontos', type=int, default=2000, help="Limite de pontos por série no gráfico detalhado")
+    parser.add_argument('--saida', help="Arquivo JSON onde gravar os resultados")
+    parser.add_argument('--comparar', help="Arquivo JSON de uma execução anterior")
+    parser.add_argument('--tolerancia', type=float, default=0.2, help="Aumento relativo aceito antes de apontar regressão")
+    args = parser.parse_args()
+
+    resultados = []
+    for linhas in args.linhas:
+        print(f"Gerando e medindo {linhas} linhas...", file=sys.stderr)
+        for resultado in executar(linhas, args.etapas, args.repeticoes, args.pontos):
+            resultados.append(resultado)
+            if 'segundos' in resultado:
+                print(f"{resultado['etapa']:>10} {linhas:>9}  {resultado['segundos'] * 1000:10.2f} ms")
+
+    relatorio = {
+        'criado_em': pd.Timestamp.now().isoformat(),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'maquina': platform.platform(),
+        'resultados': resultados
+    }
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as f:
+            json.dump(relatorio, f, indent=2, ensure_ascii=False)
+
+    if args.comparar:
+        with open(args.comparar, 'r', encoding='utf-8') as f:
+            anteriores = json.load(f)['resultados']
+        print("\nComparação com", args.comparar)
+        if comparar(resultados, anteriores, args.tolerancia):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+import os
+import threading
+import time
+from concurrent.futures import Future
+
+import requests  # type: ignore
+from requests.adapters import HTTPAdapter  # type: ignore
+from tenacity import Retrying, retry_if_exception, stop_after_attempt, wait_exponential  # type: ignore
+
+
+def _erro_transitorio(erro):
+    if isinstance(erro, (requests.ConnectionError, requests.Timeout)):
+        return True
+    if isinstance(erro, requests.HTTPError) and erro.response is not None:
+        return erro.response.status_code == 429 or erro.response.status_code >= 500
+    return False
+
+
+class SheetFetcher:
+    # Cliente HTTP compartilhado por todas as sessões do servidor: sessão com pool de conexões,
+    # timeout, novas tentativas com backoff, requisições condicionais (ETag / Last-Modified)
+    # e uma única requisição em voo por URL.
+    def __init__(self, timeout=(5, 30), tentativas=3, pool_size=10, janela_coalescencia=5.0, session=None):
+        self.timeout = timeout
+        self.tentativas = tentativas
+        self.janela_coalescencia = janela_coalescencia
+        self.session = session or requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.requisicoes = 0
+        self._respostas = {}
+        self._em_andamento = {}
+        self._lock = threading.Lock()
+
+    def fetch(self, url):
+        with self._lock:
+            anterior = self._respostas.get(url)
+            if anterior and time.monotonic() - anterior['quando'] < self.janela_coalescencia:
+                return anterior['conteudo']
+            future = self._em_andamento.get(url)
+            dono = future is None
+            if dono:
+                future = Future()
+                self._em_andamento[url] = future
+
+        if not dono:
+            # Outra sessão já está buscando esta URL: aguarda o mesmo resultado
+            return future.result()
+
+        try:
+            conteudo = self._buscar_com_tentativas(url)
+            future.set_result(conteudo)
+            return conteudo
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._em_andamento.pop(url, None)
+
+    def _buscar_com_tentativas(self, url):
+        for tentativa in Retrying(
+            stop=stop_after_attempt(self.tentativas),
+            wait=wait_exponential(multiplier=0.5, max=8),
+            retry=retry_if_exception(_erro_transitorio),
+            reraise=True
+        ):
+            with tentativa:
+                return self._buscar(url)
+
+    def _buscar(self, url):
+        anterior = self._respostas.get(url)
+        headers = {}
+        if anterior and anterior['etag']:
+            headers['If-None-Match'] = anterior['etag']
+        if anterior and anterior['last_modified']:
+            headers['If-Modified-Since'] = anterior['last_modified']
+
+        with self._lock:
+            self.requisicoes += 1
+        response = self.session.get(url, headers=headers, timeout=self.timeout)
+        if response.status_code == 304 and anterior:
+            conteudo = anterior['conteudo']
+        else:
+            response.raise_for_status()
+            conteudo = response.content
+
+        with self._lock:
+            self._respostas[url] = {
+                'conteudo': conteudo,
+                'etag': response.headers.get('ETag') or (anterior or {}).get('etag'),
+                'last_modified': response.headers.get('Last-Modified') or (anterior or {}).get('last_modified'),
+                'quando': time.monotonic()
+            }
+        return conteudo
+
+
+_fetcher = None
+_fetcher_lock = threading.Lock()
+
+
+def obter_fetcher():
+    global _fetcher
+    with _fetcher_lock:
+        if _fetcher is None:
+            _fetcher = SheetFetcher(
+                timeout=(5, float(os.environ.get("SHEET_TIMEOUT", "30"))),
+                tentativas=int(os.environ.get("SHEET_RETRIES", "3")),
+                janela_coalescencia=float(os.environ.get("SHEET_COALESCE_SECONDS", "5"))
+            )
+        return _fetcher
@@ -0,0 +1,59 @@
+import numpy as np  # type: ignore
+
+
+def lttb_indices(x, y, limite):
+    # Largest-Triangle-Three-Buckets: escolhe, em cada balde, o ponto que forma o maior triângulo
+    # com o ponto anterior escolhido e a média do balde seguinte. Preserva picos e a forma da curva.
+    n = len(x)
+    if limite >= n or limite < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    bordas = np.linspace(1, n - 1, limite - 1).astype(np.int64)
+    selecionados = np.empty(limite, dtype=np.int64)
+    selecionados[0] = 0
+    selecionados[-1] = n - 1
+
+    anterior = 0
+    for i in range(limite - 2):
+        inicio = bordas[i]
+        fim = max(bordas[i + 1], inicio + 1)
+        proximo_inicio = fim
+        proximo_fim = bordas[i + 2] if i + 2 < len(bordas) else n
+        proximo_fim = max(proximo_fim, proximo_inicio + 1)
+        media_x = x[proximo_inicio:proximo_fim].mean()
+        media_y = y[proximo_inicio:proximo_fim].mean()
+
+        area = np.abs(
+            (x[anterior] - media_x) * (y[inicio:fim] - y[anterior])
+            - (x[anterior] - x[inicio:fim]) * (media_y - y[anterior])
+        )
+        anterior = inicio + int(np.argmax(area))
+        selecionados[i + 1] = anterior
+
+    # O triângulo maior nem sempre passa pelo máximo ou mínimo global: cada um toma o lugar do ponto
+    # escolhido no seu balde (se os dois caem no mesmo balde, o segundo entra a mais)
+    maximo, minimo = int(np.argmax(y)), int(np.argmin(y))
+    extras = []
+    for extremo in (maximo, minimo):
+        balde = int(np.searchsorted(bordas, extremo, side='right'))
+        if extremo == 0 or extremo == n - 1 or selecionados[balde] == extremo:
+            continue
+        if selecionados[balde] in (maximo, minimo):
+            extras.append(extremo)
+        else:
+            selecionados[balde] = extremo
+    if extras:
+        selecionados = np.sort(np.append(selecionados, extras))
+    return selecionados
+
+
+def reduzir_serie(df, coluna_x, coluna_y, limite):
+    # Devolve até `limite` linhas de df com valor em coluna_y, escolhidas por LTTB (uma a mais quando o
+    # máximo e o mínimo caem no mesmo balde)
+    validos = df[df[coluna_y].notna()]
+    if len(validos) <= limite:
+        return validos
+    x = validos[coluna_x].values.astype('datetime64[ns]').astype(np.int64)
+    return validos.iloc[lttb_indices(x, validos[coluna_y].values, limite)]
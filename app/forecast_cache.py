@@ -0,0 +1,129 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd  # type: ignore
+
+
+def fingerprint_serie(df_prophet):
+    # Hash estável da série mensal (ds, y); muda apenas quando os dados mudam
+    hashes = pd.util.hash_pandas_object(df_prophet[['ds', 'y']], index=False).values
+    return hashlib.sha1(hashes.tobytes()).hexdigest()
+
+
+def ajustar_prophet(df_prophet, periods=12, freq='ME'):
+    # Prophet (e cmdstanpy) só é importado quando um ajuste é de fato necessário
+    from prophet import Prophet  # type: ignore
+    model = Prophet()
+    model.fit(df_prophet)
+    future = model.make_future_dataframe(periods=periods, freq=freq)
+    forecast = model.predict(future)
+    return model, forecast
+
+
+class ForecastCache:
+    def __init__(self, max_entries=16, cache_dir=None, max_disk_entries=64):
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self.max_disk_entries = max_disk_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def _key(self, estacao, variavel, fingerprint, periods, freq):
+        return (estacao, variavel, fingerprint, periods, freq)
+
+    def _file_prefix(self, key):
+        nome = '|'.join(str(parte) for parte in key)
+        return os.path.join(self.cache_dir, hashlib.sha1(nome.encode('utf-8')).hexdigest())
+
+    def get_entry(self, estacao, variavel, df_prophet, periods=12, freq='ME'):
+        key = self._key(estacao, variavel, fingerprint_serie(df_prophet), periods, freq)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry
+
+        entry = self._load_from_disk(key)
+        if entry is not None:
+            self._store(key, entry)
+        return entry
+
+    def get(self, estacao, variavel, df_prophet, periods=12, freq='ME'):
+        entry = self.get_entry(estacao, variavel, df_prophet, periods, freq)
+        return entry['forecast'] if entry is not None else None
+
+    def get_or_fit(self, estacao, variavel, df_prophet, periods=12, freq='ME'):
+        forecast = self.get(estacao, variavel, df_prophet, periods, freq)
+        if forecast is not None:
+            return forecast
+
+        model, forecast = ajustar_prophet(df_prophet, periods, freq)
+        self.put(estacao, variavel, df_prophet, model, forecast, periods, freq)
+        return forecast
+
+    def put(self, estacao, variavel, df_prophet, model, forecast, periods=12, freq='ME'):
+        key = self._key(estacao, variavel, fingerprint_serie(df_prophet), periods, freq)
+        entry = {'model': model, 'forecast': forecast, 'fitted_at': time.time()}
+        self._store(key, entry)
+        self._save_to_disk(key, entry)
+
+    def _store(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _load_from_disk(self, key):
+        if not self.cache_dir:
+            return None
+        prefix = self._file_prefix(key)
+        if not (os.path.exists(prefix + '.json') and os.path.exists(prefix + '.parquet')):
+            return None
+        try:
+            from prophet.serialize import model_from_json  # type: ignore
+            with open(prefix + '.json', 'r', encoding='utf-8') as f:
+                model = model_from_json(f.read())
+            forecast = pd.read_parquet(prefix + '.parquet')
+        except Exception:
+            # Arquivo corrompido ou de versão incompatível: ajusta novamente
+            return None
+        os.utime(prefix + '.json')
+        return {'model': model, 'forecast': forecast, 'fitted_at': os.path.getmtime(prefix + '.parquet')}
+
+    def _save_to_disk(self, key, entry):
+        if not self.cache_dir:
+            return
+        prefix = self._file_prefix(key)
+        try:
+            from prophet.serialize import model_to_json  # type: ignore
+            with open(prefix + '.json', 'w', encoding='utf-8') as f:
+                f.write(model_to_json(entry['model']))
+            entry['forecast'].to_parquet(prefix + '.parquet', index=False)
+        except Exception:
+            return
+        self._evict_disk()
+
+    def _evict_disk(self):
+        arquivos = [
+            os.path.join(self.cache_dir, nome)
+            for nome in os.listdir(self.cache_dir)
+            if nome.endswith('.json')
+        ]
+        if len(arquivos) <= self.max_disk_entries:
+            return
+        arquivos.sort(key=os.path.getmtime)
+        for arquivo in arquivos[:len(arquivos) - self.max_disk_entries]:
+            prefix = arquivo[:-len('.json')]
+            for ext in ('.json', '.parquet'):
+                if os.path.exists(prefix + ext):
+                    os.remove(prefix + ext)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
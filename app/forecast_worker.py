@@ -0,0 +1,111 @@
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from forecast_cache import ajustar_prophet, fingerprint_serie
+
+
+def _ajustar_em_processo(df_prophet, periods, freq):
+    # Executa no processo filho; o modelo volta serializado para não depender do pickle do Stan
+    from prophet.serialize import model_to_json  # type: ignore
+    model, forecast = ajustar_prophet(df_prophet, periods, freq)
+    return model_to_json(model), forecast
+
+
+# Guarda o último resultado bom, os ajustes em andamento e as falhas por (estação, variável)
+class ForecastStore:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._results = {}
+        self._pending = {}
+        self._errors = {}
+        self._failed = {}
+
+    def start(self, key, fingerprint):
+        # Retorna False se já existe um ajuste em andamento para os mesmos dados, ou se esses dados
+        # já falharam: só uma série nova (outra impressão digital) é enviada de novo
+        with self._lock:
+            if self._pending.get(key) == fingerprint or self._failed.get(key) == fingerprint:
+                return False
+            self._pending[key] = fingerprint
+            return True
+
+    def finish(self, key, fingerprint, forecast, updated_at=None):
+        with self._lock:
+            self._results[key] = {
+                'forecast': forecast,
+                'fingerprint': fingerprint,
+                'updated_at': updated_at if updated_at is not None else time.time()
+            }
+            self._errors.pop(key, None)
+            self._failed.pop(key, None)
+            if self._pending.get(key) == fingerprint:
+                del self._pending[key]
+
+    def fail(self, key, fingerprint, error):
+        with self._lock:
+            self._errors[key] = str(error)
+            self._failed[key] = fingerprint
+            if self._pending.get(key) == fingerprint:
+                del self._pending[key]
+
+    def latest(self, key):
+        with self._lock:
+            return self._results.get(key)
+
+    def is_pending(self, key):
+        with self._lock:
+            return key in self._pending
+
+    def error(self, key):
+        with self._lock:
+            return self._errors.get(key)
+
+
+class ForecastWorker:
+    def __init__(self, store=None, cache=None, executor=None, max_workers=None):
+        self.store = store if store is not None else ForecastStore()
+        self.cache = cache
+        if executor is None:
+            # spawn evita herdar por fork as threads do servidor do Streamlit
+            executor = ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context('spawn'))
+        self.executor = executor
+
+    def request(self, estacao, variavel, df_prophet, periods=12, freq='ME'):
+        # Agenda o ajuste se necessário e devolve o último resultado disponível (ou None)
+        key = (estacao, variavel)
+        fingerprint = fingerprint_serie(df_prophet)
+
+        latest = self.store.latest(key)
+        if latest is not None and latest['fingerprint'] == fingerprint:
+            return latest
+
+        if self.cache is not None:
+            entry = self.cache.get_entry(estacao, variavel, df_prophet, periods, freq)
+            if entry is not None:
+                self.store.finish(key, fingerprint, entry['forecast'], entry['fitted_at'])
+                return self.store.latest(key)
+
+        if self.store.start(key, fingerprint):
+            future = self.executor.submit(_ajustar_em_processo, df_prophet, periods, freq)
+            future.add_done_callback(
+                lambda f: self._on_done(f, key, fingerprint, df_prophet, periods, freq)
+            )
+        return latest
+
+    def _on_done(self, future, key, fingerprint, df_prophet, periods, freq):
+        try:
+            model_json, forecast = future.result()
+        except Exception as e:
+            self.store.fail(key, fingerprint, e)
+            return
+
+        self.store.finish(key, fingerprint, forecast)
+        if self.cache is not None:
+            from prophet.serialize import model_from_json  # type: ignore
+            estacao, variavel = key
+            self.cache.put(estacao, variavel, df_prophet, model_from_json(model_json), forecast, periods, freq)
+
+    def shutdown(self, wait=True):
+        self.executor.shutdown(wait=wait)
@@ -1,9 +1,29 @@
-def mes_ano_extenso(mes, ano):
-    meses = ['01', '02', '03', '04', '05', '06', '07', '08', '09', '10', '11', '12']
-    return f'{ano}-{meses[mes - 1]}'
-
-def nome_mes_ano(mes_ano):
-    ano = mes_ano[:4]
-    mes = int(mes_ano[5:])
-    meses = ['Janeiro', 'Fevereiro', 'Março', 'Abril', 'Maio', 'Junho', 'Julho', 'Agosto', 'Setembro', 'Outubro', 'Novembro', 'Dezembro']
-    return f'{meses[mes - 1]} de {ano}'
\ No newline at end of file
+import pandas as pd  # type: ignore
+
+from quality import COLUNA_QUALIDADE, descrever
+
+def _formatar_valores_unicos(valores, formatar):
+    # Formata apenas os valores distintos (dias, meses, minutos) e expande por códigos inteiros
+    codes, uniques = pd.factorize(valores, sort=True)
+    return pd.Categorical.from_codes(codes, categories=formatar(uniques))
+
+def _colunas_texto(datas):
+    minutos = datas.dt.hour * 60 + datas.dt.minute
+    return {
+        'DATA': _formatar_valores_unicos(datas.dt.normalize(), lambda dias: dias.strftime('%d/%m/%Y')),
+        'HORA': _formatar_valores_unicos(minutos, lambda valores: [f'{int(m) // 60:02d}:{int(m) % 60:02d}' for m in valores]),
+        'MES_ANO': _formatar_valores_unicos(datas.dt.to_period('M'), lambda meses: meses.strftime('%Y-%m'))
+    }
+
+def formatar_tabela(df, coluna='Carimbo de data/hora'):
+    # Textos de data e hora gerados só para as linhas exibidas; o DataFrame em cache guarda apenas o datetime64
+    tabela = df.drop(columns=[coluna])
+    for nome, valores in tabela.dtypes.items():
+        if valores == 'float32':
+            # float32 -> float64 mostraria 2.5899999 no lugar de 2.59
+            tabela[nome] = tabela[nome].astype('float64').round(3)
+    for nome, valores in _colunas_texto(df[coluna]).items():
+        tabela[nome] = valores
+    if COLUNA_QUALIDADE in tabela.columns:
+        tabela[COLUNA_QUALIDADE] = descrever(tabela[COLUNA_QUALIDADE])
+    return tabela
@@ -0,0 +1,367 @@
+import glob
+import hashlib
+import io
+import json
+import os
+import shutil
+import threading
+import time
+
+import pandas as pd  # type: ignore
+import pyarrow as pa  # type: ignore
+import pyarrow.parquet as pq  # type: ignore
+
+from data_service import obter_fetcher
+from profiling import span
+from quality import COLUNA_QUALIDADE, marcar_duplicados, marcar_picos, validar
+
+COLUNA_CARIMBO = 'Carimbo de data/hora'
+COLUNAS_NUMERICAS = ['Nível do Rio (m)', 'Chuva (mm)']
+# Tipo gravado das colunas de texto (operador, status)
+TEXTO = pa.dictionary(pa.int32(), pa.string())
+SEM_CATEGORIAS = pd.CategoricalDtype(pd.Index([], dtype=object))
+# Muda quando o formato gravado muda; snapshots de outra versão são reprocessados do zero
+ESQUEMA = 5
+INGESTAO_DIR = os.environ.get("INGESTAO_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "dados"))
+
+_locks = {}
+_locks_guard = threading.Lock()
+
+
+def sheet_url(sheet_id, gid, base_url="https://docs.google.com"):
+    return f"{base_url}/spreadsheets/d/{sheet_id}/export?format=csv&gid={gid}"
+
+
+class HttpSheetSource:
+    def __init__(self, sheet_id, gid, base_url="https://docs.google.com", fetcher=None):
+        self.url = sheet_url(sheet_id, gid, base_url)
+        self.fetcher = fetcher or obter_fetcher()
+
+    def read(self):
+        return self.fetcher.fetch(self.url)
+
+
+class FileSheetSource:
+    def __init__(self, path):
+        self.path = path
+
+    def read(self):
+        with open(self.path, 'rb') as f:
+            return f.read()
+
+
+def criar_fonte(sheet_id, gid):
+    # SHEET_SOURCE_DIR aponta para CSVs locais ({sheet_id}_{gid}.csv); SHEET_BASE_URL para um servidor de testes
+    source_dir = os.environ.get("SHEET_SOURCE_DIR")
+    if source_dir:
+        return FileSheetSource(os.path.join(source_dir, f"{sheet_id}_{gid}.csv"))
+    return HttpSheetSource(sheet_id, gid, base_url=os.environ.get("SHEET_BASE_URL", "https://docs.google.com"))
+
+
+def limpar_dados(df):
+    if COLUNA_CARIMBO in df.columns:
+        # DATA, HORA e demais colunas de exibição são derivadas depois, de forma vetorizada
+        df[COLUNA_CARIMBO] = pd.to_datetime(df[COLUNA_CARIMBO], dayfirst=True)
+        df = df.drop(columns=['DATA', 'HORA'], errors='ignore')
+        # Estável: entre carimbos repetidos a ordem de envio decide qual resposta vale
+        df = df.sort_values(by=COLUNA_CARIMBO, ascending=True, kind='stable')
+
+    if 'Nível do Rio (m)' in df.columns:
+        df['Nível do Rio (m)'] = df['Nível do Rio (m)'].astype(str).str.replace('m', '')  # Remover "m"
+        df['Nível do Rio (m)'] = pd.to_numeric(df['Nível do Rio (m)'].str.replace(',', '.'), errors='coerce')  # Convertendo para numérico
+
+    if 'Chuva (mm)' in df.columns:
+        df['Chuva (mm)'] = df['Chuva (mm)'].astype(str).str.replace('mm', '')  # Remover "mm"
+        df['Chuva (mm)'] = pd.to_numeric(df['Chuva (mm)'].str.replace(',', '.'), errors='coerce')
+
+    return compactar_tipos(df)
+
+
+def compactar_tipos(df):
+    # Nível e chuva têm duas casas decimais: float32 basta. Operadores e status se repetem em quase
+    # todas as linhas: category guarda cada texto uma vez e um código inteiro por linha.
+    for coluna in df.columns:
+        if coluna in COLUNAS_NUMERICAS:
+            if df[coluna].dtype != 'float32':
+                df[coluna] = df[coluna].astype('float32')
+        elif df[coluna].dtype == object:
+            df[coluna] = df[coluna].astype('category')
+        elif coluna not in (COLUNA_CARIMBO, COLUNA_QUALIDADE) and df[coluna].dtype.kind == 'f' and df[coluna].isna().all():
+            # Status em branco em todas as linhas novas: read_csv devolve float64 (NaN), que não se junta
+            # às categorias de texto das linhas anteriores. Vira category de texto sem categorias.
+            df[coluna] = df[coluna].astype(SEM_CATEGORIAS)
+    return df
+
+
+def anexar_linhas(df, novos):
+    # Um concat simples converteria colunas category com categorias diferentes em object: as duas
+    # partes recebem antes as mesmas categorias
+    df, novos = df.copy(deep=False), novos.copy(deep=False)
+    for coluna in df.columns.intersection(novos.columns):
+        partes = [df[coluna], novos[coluna]]
+        if any(isinstance(parte.dtype, pd.CategoricalDtype) for parte in partes):
+            categorias = pd.api.types.union_categoricals(
+                [parte.astype('category') for parte in partes], ignore_order=True
+            ).categories
+            tipo = pd.CategoricalDtype(categorias)
+            df[coluna], novos[coluna] = df[coluna].astype(tipo), novos[coluna].astype(tipo)
+    return pd.concat([df, novos], ignore_index=True)
+
+
+def intercalar_linhas(df, novos):
+    # Anexa a cauda da planilha ao df ordenado. Linhas com carimbo anterior ao último do df (envio
+    # retroativo) são intercaladas por ordenação estável, como na carga completa: empates mantêm a ordem
+    # de envio. Devolve o df e a posição da primeira linha nova.
+    juntos = anexar_linhas(df, novos)
+    if df.empty or novos.empty or COLUNA_CARIMBO not in juntos.columns:
+        return juntos, len(df)
+    primeiro = novos[COLUNA_CARIMBO].min()
+    if primeiro >= df[COLUNA_CARIMBO].iloc[-1]:
+        return juntos, len(df)
+    inicio = int(df[COLUNA_CARIMBO].searchsorted(primeiro, side='right'))
+    return juntos.sort_values(COLUNA_CARIMBO, kind='stable', ignore_index=True), inicio
+
+
+def gravar_parquet(df, caminho, **kwargs):
+    # Grava em arquivo temporário e troca de uma vez, para quem lê nunca pegar um arquivo pela metade
+    tmp_path = caminho + '.tmp'
+    df.to_parquet(tmp_path, **kwargs)
+    os.replace(tmp_path, caminho)
+
+
+def gravar_json(dados, caminho):
+    tmp_path = caminho + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(dados, f, ensure_ascii=False)
+    os.replace(tmp_path, caminho)
+
+
+def _tipo_gravado(campo):
+    if campo.name in COLUNAS_NUMERICAS:
+        return pa.float32()
+    if campo.name == COLUNA_QUALIDADE:
+        return pa.uint8()
+    if campo.name == COLUNA_CARIMBO:
+        return pa.timestamp('ns')
+    return TEXTO
+
+
+def _tabela_lote(df):
+    # Cada lote é gravado com o mesmo esquema: uma cauda em que um status ficou em branco em todas as
+    # linhas chega como double e não concatenaria com os lotes anteriores (dictionary) na leitura
+    tabela = pa.Table.from_pandas(df, preserve_index=False)
+    campos, colunas = [], []
+    for campo, coluna in zip(tabela.schema, tabela.columns):
+        tipo = _tipo_gravado(campo)
+        if tipo == TEXTO and coluna.type != TEXTO:
+            coluna = coluna.cast(pa.string())
+        campos.append(pa.field(campo.name, tipo))
+        colunas.append(coluna.cast(tipo))
+    return pa.Table.from_arrays(colunas, schema=pa.schema(campos))
+
+
+def _sha1(dados):
+    return hashlib.sha1(dados).hexdigest()
+
+
+class StationStore:
+    # Snapshot Parquet por estação, particionado por mês (mes=AAAA-MM/lote-N.parquet, compacto-N.parquet), mais um meta.json
+    # com o estado da ingestão. Os lotes são somente-anexados e lidos com memory map.
+    max_lotes_por_particao = 8
+
+    def __init__(self, base_dir, station_id):
+        self.dir = os.path.join(base_dir, station_id)
+        self.meta_path = os.path.join(self.dir, 'meta.json')
+
+    def load_meta(self):
+        if not os.path.exists(self.meta_path):
+            return {}
+        with open(self.meta_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def save_meta(self, meta):
+        os.makedirs(self.dir, exist_ok=True)
+        gravar_json(meta, self.meta_path)
+
+    def _particoes(self):
+        return sorted(glob.glob(os.path.join(self.dir, 'mes=*')))
+
+    def meses(self):
+        return [os.path.basename(particao)[len('mes='):] for particao in self._particoes()]
+
+    def _lotes(self, particao):
+        # Arquivos válidos da partição: a compactação mais recente e os lotes posteriores a ela.
+        # Lotes já compactados que sobraram de uma interrupção são ignorados (e removidos na próxima compactação).
+        lotes = sorted(glob.glob(os.path.join(particao, 'lote-*.parquet')))
+        compactos = sorted(glob.glob(os.path.join(particao, 'compacto-*.parquet')))
+        if not compactos:
+            return lotes
+        ate = _numero_lote(compactos[-1])
+        return [compactos[-1]] + [path for path in lotes if _numero_lote(path) > ate]
+
+    def _proximo_lote(self):
+        meta = self.load_meta()
+        return meta.get('proximo_lote', 0)
+
+    def load(self, meses=None):
+        tabelas = []
+        for particao in self._particoes():
+            if meses is not None and os.path.basename(particao)[len('mes='):] not in meses:
+                continue
+            tabelas.extend(pq.read_table(path, memory_map=True, partitioning=None) for path in self._lotes(particao))
+        if not tabelas:
+            return pd.DataFrame()
+        tabela = pa.concat_tables(tabelas, promote_options='permissive')
+        df = tabela.to_pandas()
+        if COLUNA_CARIMBO in df.columns:
+            df = df.sort_values(COLUNA_CARIMBO, kind='stable', ignore_index=True)
+        return df
+
+    def append(self, df):
+        # Devolve o número do próximo lote, a ser gravado no meta.json junto com o restante do estado
+        numero = self._proximo_lote()
+        if COLUNA_CARIMBO in df.columns:
+            meses = df[COLUNA_CARIMBO].dt.strftime('%Y-%m').fillna('sem-data')
+        else:
+            meses = pd.Series('sem-data', index=df.index)
+        for mes, parte in df.groupby(meses, sort=True):
+            particao = os.path.join(self.dir, f'mes={mes}')
+            os.makedirs(particao, exist_ok=True)
+            pq.write_table(_tabela_lote(parte), os.path.join(particao, f'lote-{numero:06d}.parquet'))
+            if len(self._lotes(particao)) > self.max_lotes_por_particao:
+                self._compactar(particao, numero)
+        return numero + 1
+
+    def _compactar(self, particao, numero):
+        # O arquivo compactado entra no lugar antes de qualquer remoção: uma interrupção no meio
+        # deixa arquivos a mais, nunca a menos
+        lotes = self._lotes(particao)
+        tabela = pa.concat_tables([pq.read_table(path, partitioning=None) for path in lotes], promote_options='permissive')
+        destino = os.path.join(particao, f'compacto-{numero:06d}.parquet')
+        tmp_path = destino + '.tmp'
+        pq.write_table(tabela, tmp_path)
+        os.replace(tmp_path, destino)
+        for path in glob.glob(os.path.join(particao, '*.parquet')):
+            if path != destino and _numero_lote(path) <= numero:
+                os.remove(path)
+
+    def reset(self):
+        for particao in self._particoes():
+            shutil.rmtree(particao)
+        if os.path.exists(self.meta_path):
+            os.remove(self.meta_path)
+
+
+def _numero_lote(path):
+    # lote-000012.parquet / compacto-000012.parquet -> 12
+    return int(os.path.basename(path).split('-')[1].split('.')[0])
+
+
+def _lock_para(store):
+    with _locks_guard:
+        return _locks.setdefault(store.dir, threading.Lock())
+
+
+def atualizar_estacao(source, store):
+    return _ingerir(source, store, snapshot=True)
+
+
+def ingerir_novas(source, store, desde=None, linhas=None):
+    # Para consultas frequentes (modo ao vivo): devolve só as linhas novas, sem ler o snapshot.
+    # desde/linhas: último carimbo e total de linhas que o chamador já tem; se outra ingestão avançou
+    # o store nesse meio tempo, as linhas que faltam ao chamador também são devolvidas.
+    # None indica que o histórico mudou e o chamador precisa recarregar tudo.
+    return _ingerir(source, store, snapshot=False, desde=desde, linhas_chamador=linhas)
+
+
+def _linhas_depois(store, desde, linhas_chamador, total):
+    # Lê do snapshot as linhas posteriores ao que o chamador tem; None se a contagem não fecha
+    if desde is None or linhas_chamador > total:
+        return None
+    desde = pd.Timestamp(desde)
+    recentes = store.load(meses=[mes for mes in store.meses() if mes >= desde.strftime('%Y-%m')])
+    if recentes.empty or COLUNA_CARIMBO not in recentes.columns:
+        return None
+    recentes = recentes[recentes[COLUNA_CARIMBO] > desde].reset_index(drop=True)
+    if linhas_chamador + len(recentes) != total:
+        return None
+    return compactar_tipos(recentes)
+
+
+def _ingerir(source, store, snapshot, desde=None, linhas_chamador=None):
+    with _lock_para(store):
+        with span('download') as registro:
+            bruto = source.read()
+            registro['bytes'] = len(bruto)
+        meta = store.load_meta()
+        fim_cabecalho = bruto.find(b'\n') + 1 or len(bruto)
+        cabecalho = bruto[:fim_cabecalho]
+        consumido = meta.get('bytes', 0)
+
+        # A planilha de formulário só recebe linhas no final: se o trecho já lido não mudou,
+        # basta processar os bytes novos. Qualquer edição no histórico força o reprocessamento completo.
+        incremental = (
+            meta
+            and meta.get('esquema') == ESQUEMA
+            and meta.get('cabecalho') == _sha1(cabecalho)
+            and len(bruto) >= consumido
+            and meta.get('prefixo') == _sha1(memoryview(bruto)[:consumido])
+        )
+        anterior = pd.DataFrame()
+        if incremental:
+            if snapshot:
+                with span('snapshot') as registro:
+                    anterior = store.load()
+                    registro['linhas'] = len(anterior)
+            cauda = bruto[consumido:]
+        else:
+            store.reset()
+            cauda = bruto[fim_cabecalho:]
+
+        novos = pd.DataFrame()
+        proximo_lote = meta.get('proximo_lote', 0) if incremental else 0
+        # Geração do snapshot: muda a cada reprocessamento completo (histórico editado na planilha) e vai
+        # em df.attrs para os agregados em memória saberem que precisam ser refeitos. É o instante do
+        # reprocessamento, para continuar crescendo mesmo se o diretório de dados for apagado.
+        geracao = meta.get('geracao', 0) if incremental else time.time_ns()
+        if cauda.strip():
+            with span('parse', bytes=len(cauda)) as registro:
+                novos = limpar_dados(pd.read_csv(io.BytesIO(cabecalho + cauda), encoding='utf-8'))
+                registro['linhas'] = len(novos)
+            if not novos.empty:
+                # Faixa e duplicados são gravados junto com as linhas
+                with span('qualidade', linhas=len(novos)):
+                    novos = validar(novos)
+                proximo_lote = store.append(novos)
+
+        # Os bytes novos são sempre linhas novas (o prefixo já foi conferido), mesmo com carimbo retroativo
+        df = novos if anterior.empty else intercalar_linhas(anterior, novos)[0]
+        if snapshot:
+            # Picos dependem da medição seguinte e um duplicado pode ter a primeira resposta num lote
+            # anterior: os dois são refeitos sobre o df completo (o bit gravado no lote antigo não muda)
+            with span('picos', linhas=len(df)):
+                marcar_picos(marcar_duplicados(df))
+        ultimo_carimbo = meta.get('ultimo_carimbo') if incremental else None
+        if COLUNA_CARIMBO in df.columns and not df.empty:
+            ultimo_carimbo = df[COLUNA_CARIMBO].max().isoformat()
+        linhas = len(df) if snapshot or not incremental else meta.get('linhas', 0) + len(novos)
+        store.save_meta({
+            'esquema': ESQUEMA,
+            'bytes': len(bruto),
+            'prefixo': _sha1(bruto),
+            'cabecalho': _sha1(cabecalho),
+            'ultimo_carimbo': ultimo_carimbo,
+            'linhas': linhas,
+            'proximo_lote': proximo_lote,
+            'geracao': geracao
+        })
+        if not snapshot and not incremental:
+            return None
+        if not snapshot and linhas_chamador is not None and meta.get('linhas') != linhas_chamador:
+            # Outra ingestão (botão 🔄, expiração do cache da página, precompute) avançou o store depois
+            # da última consulta do chamador: as linhas que faltam a ele vêm do snapshot
+            df = _linhas_depois(store, desde, linhas_chamador, linhas)
+            if df is None:
+                return None
+        df.attrs['geracao'] = geracao
+        return df
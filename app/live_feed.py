@@ -0,0 +1,41 @@
+import threading
+import time
+
+import pipeline
+from ingestion import INGESTAO_DIR
+
+
+class LiveFeed:
+    # Estado ao vivo de uma estação, compartilhado entre sessões: no máximo uma consulta à planilha por
+    # intervalo, e cada consulta limpa e deriva só as linhas novas (pipeline.atualizar)
+    def __init__(self, sheet_id, gid, intervalo=30, base_dir=INGESTAO_DIR):
+        self.sheet_id = sheet_id
+        self.gid = gid
+        self.intervalo = intervalo
+        self.base_dir = base_dir
+        self.df = None
+        self.consultado_em = None
+        self.erro = None
+        self._ultima_consulta = 0.0
+        self._lock = threading.Lock()
+
+    def iniciar(self, df):
+        # Parte do df já carregado pela página, para a primeira consulta não reler o histórico
+        with self._lock:
+            if self.df is None and not df.empty:
+                self.df = df
+        return self
+
+    def atualizar(self):
+        with self._lock:
+            if self.df is not None and time.monotonic() - self._ultima_consulta < self.intervalo:
+                return self.df
+            self._ultima_consulta = time.monotonic()
+            try:
+                self.df, _ = pipeline.atualizar(self.sheet_id, self.gid, self.df, self.base_dir)
+                self.erro = None
+            except Exception as e:
+                # Mantém os últimos dados válidos; a próxima consulta tenta de novo
+                self.erro = e
+            self.consultado_em = time.time()
+            return self.df
@@ -0,0 +1,170 @@
+import threading
+
+import numpy as np  # type: ignore
+import pandas as pd  # type: ignore
+
+from quality import chuva_valida, nivel_valido
+
+COLUNA_CARIMBO = 'Carimbo de data/hora'
+COLUNA_NIVEL = 'Nível do Rio (m)'
+COLUNA_CHUVA = 'Chuva (mm)'
+
+
+def serie_horaria(df, limite_interpolacao=6):
+    # Nível médio e chuva total por hora; lacunas curtas de nível são interpoladas e as longas ficam NaN
+    if df.empty:
+        return pd.DataFrame({'nivel': [], 'chuva': []}, index=pd.DatetimeIndex([], name=COLUNA_CARIMBO))
+    nivel = df[COLUNA_NIVEL].astype('float64').where(nivel_valido(df))
+    chuva = df[COLUNA_CHUVA].astype('float64').where(chuva_valida(df)) if COLUNA_CHUVA in df.columns else pd.Series(0.0, index=df.index)
+    horaria = pd.DataFrame(
+        {'nivel': nivel.values, 'chuva': chuva.values},
+        index=pd.DatetimeIndex(df[COLUNA_CARIMBO].values, name=COLUNA_CARIMBO)
+    ).resample('h').agg({'nivel': 'mean', 'chuva': 'sum'})
+    horaria['nivel'] = horaria['nivel'].interpolate(limit=limite_interpolacao, limit_area='inside')
+    return horaria
+
+
+def _regressores(nivel, chuva, ordem_nivel, ordem_chuva):
+    # Linha t: [1, y(t-1) .. y(t-p), r(t) .. r(t-q)] -> y(t); linhas com lacunas são descartadas
+    atraso = max(ordem_nivel, ordem_chuva)
+    n = len(nivel)
+    if n <= atraso:
+        return np.empty((0, 2 + ordem_nivel + ordem_chuva)), np.empty(0), np.empty(0, dtype=int)
+    colunas = [np.ones(n - atraso)]
+    colunas += [nivel[atraso - i:n - i] for i in range(1, ordem_nivel + 1)]
+    colunas += [chuva[atraso - j:n - j] for j in range(ordem_chuva + 1)]
+    X = np.column_stack(colunas)
+    y = nivel[atraso:]
+    validas = np.isfinite(X).all(axis=1) & np.isfinite(y)
+    return X[validas], y[validas], np.flatnonzero(validas) + atraso
+
+
+class NowcastARX:
+    # Previsão das próximas horas do nível: ARX horário com a chuva como entrada.
+    # O ajuste inicial é um mínimos quadrados ponderado (esquecimento exponencial), vetorizado;
+    # depois cada hora nova entra por mínimos quadrados recursivos, sem reajustar o histórico.
+    def __init__(self, ordem_nivel=3, ordem_chuva=6, esquecimento=0.995, janela_dias=90, limite_interpolacao=6):
+        self.ordem_nivel = ordem_nivel
+        self.ordem_chuva = ordem_chuva
+        self.esquecimento = esquecimento
+        self.janela_dias = janela_dias
+        self.limite_interpolacao = limite_interpolacao
+        self._lock = threading.Lock()
+        self.reiniciar()
+
+    def reiniciar(self):
+        self.theta = None
+        self.P = None
+        self.variancia = None
+        self.ultima_hora = None
+        self.recente = None
+        self.observacoes = 0
+
+    @property
+    def _atraso(self):
+        return max(self.ordem_nivel, self.ordem_chuva)
+
+    def atualizar(self, df):
+        # df ordenado por data; só as horas posteriores à última já ajustada são processadas
+        if df.empty or COLUNA_CARIMBO not in df.columns or COLUNA_NIVEL not in df.columns:
+            return self
+        with self._lock:
+            carimbos = df[COLUNA_CARIMBO].values
+            fim = pd.Timestamp(carimbos[-1])
+            if self.ultima_hora is not None and fim < self.ultima_hora:
+                # df mais antigo que o já ajustado (cache da página x modo ao vivo): nada novo. Edições
+                # no histórico não reiniciam o modelo, que segue com as horas novas
+                return self
+
+            if self.ultima_hora is None:
+                corte = fim.floor('h') - pd.Timedelta(days=self.janela_dias)
+            else:
+                # Horas anteriores suficientes para os atrasos e a interpolação das horas novas
+                corte = self.ultima_hora - pd.Timedelta(hours=self._atraso + self.limite_interpolacao + 1)
+            inicio = int(np.searchsorted(carimbos, np.datetime64(corte), side='left'))
+            horaria = serie_horaria(df.iloc[inicio:], self.limite_interpolacao)
+            if horaria.empty:
+                return self
+
+            # A hora corrente ainda pode receber medições: entra só como ponto de partida da previsão
+            completas = horaria.iloc[:-1]
+            X, y, posicoes = _regressores(
+                completas['nivel'].values, completas['chuva'].values, self.ordem_nivel, self.ordem_chuva
+            )
+            horas = completas.index[posicoes]
+            if self.ultima_hora is not None:
+                novas = horas > self.ultima_hora
+                X, y, horas = X[novas], y[novas], horas[novas]
+
+            if self.theta is None:
+                self._ajustar(X, y, horas)
+            else:
+                self._atualizar_rls(X, y)
+            # Sem ajuste (poucas horas ainda), a próxima chamada reajusta a partir da janela inteira
+            if len(completas) and self.theta is not None:
+                self.ultima_hora = completas.index[-1]
+            self.recente = horaria.iloc[-(self._atraso + self.limite_interpolacao + 1):]
+        return self
+
+    def _ajustar(self, X, y, horas):
+        if len(y) < 3 * X.shape[1]:
+            return
+        idade = (horas[-1] - horas) / pd.Timedelta(hours=1)
+        pesos = self.esquecimento ** np.asarray(idade, dtype=float)
+        raiz = np.sqrt(pesos)
+        self.theta = np.linalg.lstsq(X * raiz[:, None], y * raiz, rcond=None)[0]
+        self.P = np.linalg.pinv((X * pesos[:, None]).T @ X)
+        residuos = y - X @ self.theta
+        self.variancia = float(np.sum(pesos * residuos ** 2) / np.sum(pesos))
+        self.observacoes = len(y)
+
+    def _atualizar_rls(self, X, y):
+        lam = self.esquecimento
+        for x, alvo in zip(X, y):
+            Px = self.P @ x
+            ganho = Px / (lam + x @ Px)
+            erro = alvo - x @ self.theta
+            self.theta = self.theta + ganho * erro
+            self.P = (self.P - np.outer(ganho, Px)) / lam
+            self.variancia = lam * self.variancia + (1 - lam) * erro ** 2
+        self.observacoes += len(y)
+
+    def prever(self, horas=24, nivel_confianca=1.96):
+        # Previsão recursiva hora a hora supondo que não chove mais; None enquanto não há dados suficientes
+        with self._lock:
+            if self.theta is None or self.recente is None:
+                return None
+            recente = self.recente.copy()
+            recente['nivel'] = recente['nivel'].ffill()
+            if not np.isfinite(recente['nivel'].values[-self.ordem_nivel:]).all():
+                return None
+            niveis = list(recente['nivel'].values)
+            chuvas = list(recente['chuva'].values)
+            theta = self.theta.copy()
+            desvio = np.sqrt(self.variancia)
+            origem = recente.index[-1]
+
+        coef_nivel = theta[1:1 + self.ordem_nivel]
+        coef_chuva = theta[1 + self.ordem_nivel:]
+        previsto = np.empty(horas)
+        for h in range(horas):
+            chuvas.append(0.0)
+            x_nivel = np.array(niveis[:-self.ordem_nivel - 1:-1])
+            x_chuva = np.array(chuvas[:-self.ordem_chuva - 2:-1])
+            previsto[h] = theta[0] + coef_nivel @ x_nivel + coef_chuva @ x_chuva
+            niveis.append(previsto[h])
+
+        # Resposta ao impulso da parte AR, para a incerteza crescer com o horizonte
+        psi = np.zeros(horas)
+        psi[0] = 1.0
+        for j in range(1, horas):
+            psi[j] = sum(coef_nivel[i - 1] * psi[j - i] for i in range(1, min(j, self.ordem_nivel) + 1))
+        margem = nivel_confianca * desvio * np.sqrt(np.cumsum(psi ** 2))
+
+        return pd.DataFrame({
+            'ds': pd.date_range(origem + pd.Timedelta(hours=1), periods=horas, freq='h'),
+            'yhat': previsto,
+            'yhat_lower': previsto - margem,
+            'yhat_upper': previsto + margem
+        })
+
@@ -0,0 +1,181 @@
+# Pipeline de dados sem Streamlit: carga -> limpeza -> índice -> agregação -> previsão.
+# Usado pela página e executável pela linha de comando:
+#   python pipeline.py --estacao "ETA Cubatão" --sem-previsao
+import argparse
+import contextvars
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd  # type: ignore
+
+from alerts import AlertEngine, regras_da_estacao
+from ingestion import COLUNA_CARIMBO, INGESTAO_DIR, StationStore, atualizar_estacao, criar_fonte, ingerir_novas, intercalar_linhas
+from profiling import span
+from quality import marcar_duplicados, marcar_picos
+from rollups import StationRollup
+from time_index import SerieTemporal
+
+ESTACOES_CONFIG = os.environ.get("ESTACOES_CONFIG", os.path.join(os.path.dirname(os.path.abspath(__file__)), "estacoes.json"))
+
+
+def carregar_config(caminho=ESTACOES_CONFIG):
+    # {"Nome da estação": {"SHEET_ID": ..., "GID": ..., "ALERTAS": {...}}, ...}; a ordem do arquivo é a ordem na barra lateral
+    with open(caminho, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+    for estacao, definicao in config.items():
+        faltando = [chave for chave in ('SHEET_ID', 'GID') if not definicao.get(chave)]
+        if faltando:
+            raise ValueError(f"Estação '{estacao}' sem {', '.join(faltando)} em {caminho}")
+        try:
+            regras_da_estacao(definicao)
+        except ValueError as e:
+            raise ValueError(f"Estação '{estacao}' em {caminho}: {e}")
+    return config
+
+
+sheet_config = carregar_config()
+
+COLUNAS_OBRIGATORIAS = [COLUNA_CARIMBO, 'NOME', 'Nível do Rio (m)']
+VARIAVEIS_PREVISAO = ['Chuva (mm)', 'Nível do Rio (m)']
+
+
+def carregar(sheet_id, gid, base_dir=INGESTAO_DIR):
+    # Ingestão incremental: só as linhas novas são lidas e limpas. O DataFrame fica com o esquema
+    # compacto da ingestão; textos de data e hora são gerados na exibição (functions.formatar_tabela)
+    store = StationStore(base_dir, f"{sheet_id}_{gid}")
+    return atualizar_estacao(criar_fonte(sheet_id, gid), store)
+
+
+def atualizar(sheet_id, gid, df, base_dir=INGESTAO_DIR):
+    # Consulta rápida para o modo ao vivo: reaproveita o df em memória e só limpa as linhas novas.
+    # Devolve (df atualizado, trecho a partir da primeira linha nova); se o histórico da planilha mudou, recarrega tudo.
+    if df is None or df.empty:
+        df = carregar(sheet_id, gid, base_dir)
+        return df, df
+    store = StationStore(base_dir, f"{sheet_id}_{gid}")
+    # O df de quem chama pode estar atrás do store (outra ingestão avançou o meta.json): a contagem
+    # e o último carimbo dele permitem devolver também as linhas que ele ainda não tem
+    novos = ingerir_novas(criar_fonte(sheet_id, gid), store, desde=df[COLUNA_CARIMBO].iloc[-1], linhas=len(df))
+    if novos is None:
+        df = carregar(sheet_id, gid, base_dir)
+        return df, df
+    if novos.empty:
+        return df, novos
+    juntos, inicio = intercalar_linhas(df, novos.reset_index(drop=True))
+    juntos.attrs['geracao'] = novos.attrs.get('geracao')
+    # A medição anterior à primeira nova deixa de ser pendente: os picos são refeitos a partir dela.
+    # Um envio repetido na cauda sinaliza a resposta anterior, que já estava no df.
+    marcar_picos(marcar_duplicados(juntos, inicio), inicio - 1)
+    return juntos, juntos.iloc[inicio:]
+
+
+def _carregar_estacao(estacao, definicao, base_dir):
+    # Um span por estação agrupa os spans de download/parse/qualidade da thread dela
+    with span('estacao', estacao=estacao):
+        return carregar(definicao["SHEET_ID"], definicao["GID"], base_dir)
+
+
+def carregar_todas(config=None, base_dir=INGESTAO_DIR, max_workers=None):
+    # Carrega todas as estações em paralelo; o tempo total fica limitado pela estação mais lenta.
+    # Erros ficam no resultado da estação, sem interromper as demais.
+    config = config if config is not None else sheet_config
+    if not config:
+        return {}
+    # As threads do pool não herdam contextvars: cada tarefa roda numa cópia do contexto atual,
+    # para os spans continuarem indo para o perfil da página, aninhados no span de quem chamou
+    with ThreadPoolExecutor(max_workers=max_workers or len(config)) as executor:
+        futures = {
+            estacao: executor.submit(contextvars.copy_context().run, _carregar_estacao, estacao, definicao, base_dir)
+            for estacao, definicao in config.items()
+        }
+    resultados = {}
+    for estacao, future in futures.items():
+        try:
+            resultados[estacao] = {'df': future.result(), 'erro': None}
+        except Exception as e:
+            resultados[estacao] = {'df': pd.DataFrame(), 'erro': e}
+    return resultados
+
+
+def criar_alertas(estacao, notificadores=None):
+    return AlertEngine(estacao, regras_da_estacao(sheet_config[estacao]), notificadores)
+
+
+def colunas_faltando(df):
+    return [col for col in COLUNAS_OBRIGATORIAS if col not in df.columns]
+
+
+def indexar(df):
+    return SerieTemporal(df)
+
+
+def agregar(df, rollup=None):
+    return (rollup if rollup is not None else StationRollup()).atualizar(df)
+
+
+def series_mensais(rollup):
+    # Entradas do Prophet (ds, y): soma mensal de chuva e média mensal de nível
+    mensal = rollup.mensal()
+    fim_do_mes = mensal.index.to_timestamp(how='end').normalize()
+    return {
+        'Chuva (mm)': pd.DataFrame({'ds': fim_do_mes, 'y': mensal['chuva_soma'].values}),
+        'Nível do Rio (m)': pd.DataFrame({'ds': fim_do_mes, 'y': mensal['nivel_media'].values})
+    }
+
+
+def prever(estacao, series, cache=None):
+    # Ajuste síncrono, para CLI e jobs; a página usa o ForecastWorker
+    from forecast_cache import ForecastCache
+    cache = cache if cache is not None else ForecastCache()
+    return {variavel: cache.get_or_fit(estacao, variavel, series[variavel]) for variavel in VARIAVEIS_PREVISAO}
+
+
+def executar(estacao, config=None, base_dir=INGESTAO_DIR, com_previsao=True, cache=None, alertas=None):
+    config = config or sheet_config[estacao]
+    with span('carga'):
+        df = carregar(config["SHEET_ID"], config["GID"], base_dir)
+    resultado = {'estacao': estacao, 'df': df, 'faltando': colunas_faltando(df)}
+    if df.empty or resultado['faltando']:
+        return resultado
+
+    resultado['serie'] = indexar(df)
+    with span('rollup'):
+        resultado['rollup'] = agregar(df)
+    resultado['series_mensais'] = series_mensais(resultado['rollup'])
+    if alertas is not None:
+        # O motor guarda o estado entre execuções e só avalia as linhas novas
+        with span('alertas'):
+            alertas.avaliar(df)
+        resultado['alertas'] = alertas.resumo()
+    if com_previsao:
+        with span('previsao'):
+            resultado['previsoes'] = prever(estacao, resultado['series_mensais'], cache)
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Executa o pipeline de dados das estações sem o Streamlit")
+    parser.add_argument('--estacao', action='append', choices=list(sheet_config), help="Pode ser repetido; padrão: todas")
+    parser.add_argument('--dados', default=INGESTAO_DIR, help="Diretório dos snapshots das estações")
+    parser.add_argument('--sem-previsao', action='store_true')
+    args = parser.parse_args()
+
+    for estacao in args.estacao or list(sheet_config):
+        resultado = executar(estacao, base_dir=args.dados, com_previsao=not args.sem_previsao)
+        df = resultado['df']
+        if df.empty or resultado['faltando']:
+            print(f"{estacao}: sem dados ou colunas faltando {resultado['faltando']}")
+            continue
+        resumo = resultado['rollup'].resumo()
+        print(
+            f"{estacao}: {len(df)} registros de {resultado['serie'].inicio:%d/%m/%Y} a {resultado['serie'].fim:%d/%m/%Y}, "
+            f"nível médio {resumo['nivel_medio']:.2f} m, chuva total {resumo['chuva_total']:.1f} mm"
+        )
+        for variavel, forecast in resultado.get('previsoes', {}).items():
+            ultimo = forecast.iloc[-1]
+            print(f"  previsão {variavel} para {ultimo['ds']:%m/%Y}: {max(ultimo['yhat'], 0):.2f}")
+
+
+if __name__ == '__main__':
+    main()
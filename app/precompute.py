@@ -0,0 +1,64 @@
+# Materializa os artefatos do dashboard (snapshot limpo, rollups e previsões) fora do Streamlit.
+# Com ARTEFATOS_DIR definido, a página apenas lê esses arquivos.
+#   python precompute.py --saida artefatos                 # uma execução
+#   python precompute.py --saida artefatos --intervalo 900  # a cada 15 minutos
+import argparse
+import os
+import time
+import traceback
+
+import pipeline
+from alerts import criar_notificadores
+from artifacts import gravar_artefatos
+from forecast_cache import ForecastCache
+from ingestion import INGESTAO_DIR
+
+
+def executar_uma_vez(estacoes, saida, base_dir, cache, com_previsao=True, alertas=None):
+    falhas = 0
+    for estacao in estacoes:
+        inicio = time.perf_counter()
+        try:
+            resultado = pipeline.executar(
+                estacao, base_dir=base_dir, com_previsao=com_previsao, cache=cache,
+                alertas=(alertas or {}).get(estacao)
+            )
+            if resultado['df'].empty or resultado['faltando']:
+                print(f"{estacao}: sem dados ou colunas faltando {resultado['faltando']}", flush=True)
+                falhas += 1
+                continue
+            manifesto = gravar_artefatos(resultado, saida, pipeline.sheet_config[estacao])
+            print(f"{estacao}: {manifesto['linhas']} registros em {time.perf_counter() - inicio:.1f}s", flush=True)
+            for alerta in resultado.get('alertas', {}).get('ativos', []):
+                print(f"  alerta: {alerta['mensagem']}", flush=True)
+        except Exception:
+            falhas += 1
+            print(f"{estacao}: erro ao gerar artefatos", flush=True)
+            traceback.print_exc()
+    return falhas
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera os artefatos do dashboard para todas as estações")
+    parser.add_argument('--saida', default=os.environ.get("ARTEFATOS_DIR", "artefatos"))
+    parser.add_argument('--dados', default=INGESTAO_DIR, help="Diretório dos snapshots das estações")
+    parser.add_argument('--estacao', action='append', choices=list(pipeline.sheet_config), help="Pode ser repetido; padrão: todas")
+    parser.add_argument('--intervalo', type=int, default=0, help="Segundos entre execuções; 0 executa uma vez")
+    parser.add_argument('--sem-previsao', action='store_true')
+    args = parser.parse_args()
+
+    estacoes = args.estacao or list(pipeline.sheet_config)
+    # O cache em disco evita reajustar o Prophet quando a série mensal não mudou entre execuções
+    cache = ForecastCache(cache_dir=os.path.join(args.saida, 'modelos'))
+    # Um motor de alertas por estação, mantido entre execuções para avaliar só as linhas novas
+    notificadores = criar_notificadores()
+    alertas = {estacao: pipeline.criar_alertas(estacao, notificadores) for estacao in estacoes}
+    while True:
+        falhas = executar_uma_vez(estacoes, args.saida, args.dados, cache, com_previsao=not args.sem_previsao, alertas=alertas)
+        if not args.intervalo:
+            raise SystemExit(1 if falhas else 0)
+        time.sleep(args.intervalo)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+import contextvars
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+_perfil_atual = contextvars.ContextVar('perfil_atual', default=None)
+# Nível de aninhamento e fim da última etapa ficam no contexto, junto com o perfil a que pertencem: as
+# estações carregadas em paralelo (pipeline.carregar_todas) abrem spans no mesmo perfil, cada uma na sua thread
+_nivel = contextvars.ContextVar('nivel_span', default=(None, 0))
+_ultima_etapa = contextvars.ContextVar('ultima_etapa', default=(None, None))
+_log_lock = threading.Lock()
+
+
+class Profiler:
+    # Coleta intervalos nomeados (duração, linhas, bytes) de uma execução da página
+    def __init__(self, medir_payload=False):
+        self.medir_payload = medir_payload
+        self.spans = []
+        self.contexto = {}
+        self.criado_em = time.time()
+        self._inicio = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def _nivel_atual(self):
+        perfil, nivel = _nivel.get()
+        return nivel if perfil is self else 0
+
+    @contextmanager
+    def span(self, nome, **atributos):
+        nivel = self._nivel_atual()
+        registro = {'nome': nome, 'nivel': nivel, **atributos}
+        inicio = time.perf_counter()
+        token = _nivel.set((self, nivel + 1))
+        try:
+            yield registro
+        finally:
+            _nivel.reset(token)
+            fim = time.perf_counter()
+            registro['inicio_ms'] = round((inicio - self._inicio) * 1000, 2)
+            registro['duracao_ms'] = round((fim - inicio) * 1000, 2)
+            with self._lock:
+                self.spans.append(registro)
+            _ultima_etapa.set((self, fim))
+
+    def etapa(self, nome, **atributos):
+        # Fecha um intervalo que começou no fim da etapa (ou span) anterior do mesmo contexto; útil em código sequencial
+        agora = time.perf_counter()
+        perfil, ultima = _ultima_etapa.get()
+        if perfil is not self:
+            ultima = self._inicio
+        registro = {
+            'nome': nome,
+            'nivel': self._nivel_atual(),
+            **atributos,
+            'inicio_ms': round((ultima - self._inicio) * 1000, 2),
+            'duracao_ms': round((agora - ultima) * 1000, 2)
+        }
+        with self._lock:
+            self.spans.append(registro)
+        _ultima_etapa.set((self, agora))
+
+    def total_ms(self):
+        return round((time.perf_counter() - self._inicio) * 1000, 2)
+
+    def registros(self):
+        with self._lock:
+            spans = list(self.spans)
+        return sorted(spans, key=lambda registro: registro['inicio_ms'])
+
+    def gravar(self, caminho, **contexto):
+        linha = {
+            'timestamp': self.criado_em,
+            'total_ms': self.total_ms(),
+            **self.contexto,
+            **contexto,
+            'spans': self.registros()
+        }
+        diretorio = os.path.dirname(caminho)
+        if diretorio:
+            os.makedirs(diretorio, exist_ok=True)
+        with _log_lock, open(caminho, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(linha, ensure_ascii=False, default=str) + '\n')
+
+
+def ativar(perfil):
+    return _perfil_atual.set(perfil)
+
+
+def desativar(token):
+    _perfil_atual.reset(token)
+
+
+def perfil_atual():
+    return _perfil_atual.get()
+
+
+@contextmanager
+def span(nome, **atributos):
+    # Sem perfil ativo (CLI, jobs em segundo plano) o span não mede nada
+    perfil = _perfil_atual.get()
+    if perfil is None:
+        yield {}
+        return
+    with perfil.span(nome, **atributos) as registro:
+        yield registro
+
+
+def etapa(nome, **atributos):
+    perfil = _perfil_atual.get()
+    if perfil is not None:
+        perfil.etapa(nome, **atributos)
+
+
+def anotar(**contexto):
+    perfil = _perfil_atual.get()
+    if perfil is not None:
+        perfil.contexto.update(contexto)
+
+
+def tamanho_figura(fig):
+    # Serializar a figura custa tempo; só é feito quando o perfil pede
+    perfil = _perfil_atual.get()
+    if perfil is None or not perfil.medir_payload:
+        return None
+    return len(fig.to_json())
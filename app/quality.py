@@ -0,0 +1,164 @@
+import numpy as np  # type: ignore
+import pandas as pd  # type: ignore
+
+COLUNA_CARIMBO = 'Carimbo de data/hora'
+COLUNA_NIVEL = 'Nível do Rio (m)'
+COLUNA_CHUVA = 'Chuva (mm)'
+COLUNA_QUALIDADE = 'QUALIDADE'
+
+# Bits da coluna QUALIDADE (0 = medição sem problemas)
+NIVEL_FORA_DA_FAIXA = 1
+CHUVA_FORA_DA_FAIXA = 2
+PICO_NIVEL = 4
+DUPLICADO = 8
+INVALIDA_NIVEL = NIVEL_FORA_DA_FAIXA | PICO_NIVEL | DUPLICADO
+INVALIDA_CHUVA = CHUVA_FORA_DA_FAIXA | DUPLICADO
+
+DESCRICOES = {
+    NIVEL_FORA_DA_FAIXA: 'nível fora da faixa',
+    CHUVA_FORA_DA_FAIXA: 'chuva fora da faixa',
+    PICO_NIVEL: 'pico no nível',
+    DUPLICADO: 'duplicado'
+}
+
+# Nível zero é falha de leitura; acima de NIVEL_MAXIMO ou chuva acima de CHUVA_MAXIMA é erro de digitação
+NIVEL_MAXIMO = 15.0
+CHUVA_MAXIMA = 250.0
+# Pico: a medição se afasta da mediana das anteriores mais que PICO_METROS e por um fator maior que
+# PICO_RAZAO (ex.: 0,35 digitado no lugar de 3,5) e a medição seguinte volta para perto da mediana.
+# Numa cheia real o nível continua alto na leitura seguinte, então a subida nunca é marcada.
+JANELA_MEDIANA = 5
+PICO_METROS = 1.0
+PICO_RAZAO = 3.0
+# Linhas anteriores usadas como contexto da mediana ao marcar só o final do df
+CONTEXTO_PICOS = 50
+LACUNA_HORAS = 24
+
+
+def validar(novos):
+    # Regras que dependem só da própria linha (e do lote, para duplicados): gravadas junto com os dados.
+    # Picos dependem da medição seguinte e são marcados depois, sobre o df montado (marcar_picos); os
+    # duplicados são refeitos ali também, porque o envio repetido pode chegar num lote posterior.
+    flags = np.zeros(len(novos), dtype='uint8')
+    if novos.empty:
+        return novos.assign(**{COLUNA_QUALIDADE: flags})
+
+    if COLUNA_CHUVA in novos.columns:
+        chuva = novos[COLUNA_CHUVA].to_numpy(dtype='float64')
+        flags[(chuva < 0) | (chuva > CHUVA_MAXIMA)] |= CHUVA_FORA_DA_FAIXA
+    if COLUNA_CARIMBO in novos.columns:
+        # Envio repetido do formulário: vale a última resposta para o mesmo carimbo
+        flags[novos[COLUNA_CARIMBO].duplicated(keep='last').to_numpy()] |= DUPLICADO
+
+    if COLUNA_NIVEL in novos.columns:
+        nivel = novos[COLUNA_NIVEL].to_numpy(dtype='float64')
+        flags[(nivel <= 0) | (nivel > NIVEL_MAXIMO)] |= NIVEL_FORA_DA_FAIXA
+
+    return novos.assign(**{COLUNA_QUALIDADE: flags})
+
+
+def marcar_duplicados(df, inicio=0):
+    # Refaz o bit DUPLICADO a partir da primeira linha com o carimbo da linha inicio: vale a última
+    # resposta também quando ela chega numa carga posterior. O df deve estar ordenado (estável) por carimbo.
+    if df.empty or COLUNA_QUALIDADE not in df.columns or COLUNA_CARIMBO not in df.columns:
+        return df
+    carimbos = df[COLUNA_CARIMBO]
+    inicio = int(carimbos.searchsorted(carimbos.iloc[min(max(inicio, 0), len(df) - 1)], side='left'))
+    flags = df[COLUNA_QUALIDADE].to_numpy().copy()
+    flags[inicio:] &= ~np.uint8(DUPLICADO)
+    flags[inicio:][carimbos.iloc[inicio:].duplicated(keep='last').to_numpy()] |= DUPLICADO
+    df[COLUNA_QUALIDADE] = flags
+    return df
+
+
+def _desvia(valores, mediana):
+    razao = valores / mediana
+    return ((valores - mediana).abs() > PICO_METROS) & ((razao > PICO_RAZAO) | (razao < 1 / PICO_RAZAO))
+
+
+def marcar_picos(df, inicio=0):
+    # Refaz o bit PICO_NIVEL das linhas a partir de inicio (as anteriores servem só de contexto).
+    # Um pico só é confirmado quando a medição seguinte volta para perto da mediana: a última
+    # medição fica pendente, e em uso, até a próxima chegar. O df é alterado no lugar.
+    if df.empty or COLUNA_QUALIDADE not in df.columns or COLUNA_NIVEL not in df.columns:
+        return df
+    inicio = max(inicio, 0)
+    base = max(inicio - CONTEXTO_PICOS, 0)
+    flags = df[COLUNA_QUALIDADE].to_numpy().copy()
+    nivel = df[COLUNA_NIVEL].to_numpy(dtype='float64')[base:]
+    serie = pd.Series(np.where(flags[base:] & (NIVEL_FORA_DA_FAIXA | DUPLICADO), np.nan, nivel)).dropna()
+    mediana = serie.shift(1).rolling(JANELA_MEDIANA, min_periods=3).median()
+    seguinte = serie.shift(-1)
+    pico = _desvia(serie, mediana) & seguinte.notna() & ~_desvia(seguinte, mediana)
+
+    flags[inicio:] &= ~np.uint8(PICO_NIVEL)
+    posicoes = serie.index[pico.to_numpy()].to_numpy() + base
+    flags[posicoes[posicoes >= inicio]] |= PICO_NIVEL
+    df[COLUNA_QUALIDADE] = flags
+    return df
+
+
+def _flags(df):
+    if COLUNA_QUALIDADE in df.columns:
+        return df[COLUNA_QUALIDADE].to_numpy()
+    return None
+
+
+def nivel_valido(df, bits=INVALIDA_NIVEL):
+    # Sem a coluna de qualidade (dados antigos), mantém a regra anterior: nível zero é inválido
+    flags = _flags(df)
+    if flags is None:
+        if COLUNA_NIVEL not in df.columns:
+            return pd.Series(True, index=df.index)
+        return df[COLUNA_NIVEL] != 0
+    return pd.Series((flags & bits) == 0, index=df.index)
+
+
+def chuva_valida(df):
+    flags = _flags(df)
+    if flags is None:
+        return pd.Series(True, index=df.index)
+    return pd.Series((flags & INVALIDA_CHUVA) == 0, index=df.index)
+
+
+def registro_valido(df):
+    flags = _flags(df)
+    if flags is None:
+        return pd.Series(True, index=df.index)
+    return pd.Series((flags & DUPLICADO) == 0, index=df.index)
+
+
+def descrever(flags):
+    # Texto por valor distinto de QUALIDADE (são poucos), expandido pelos códigos
+    codes, valores = pd.factorize(np.asarray(flags), sort=True)
+    textos = [
+        '; '.join(texto for bit, texto in DESCRICOES.items() if int(valor) & bit) or 'ok'
+        for valor in valores
+    ]
+    return pd.Categorical.from_codes(codes, categories=textos)
+
+
+def lacunas(df, horas=LACUNA_HORAS):
+    # Intervalos entre medições consecutivas maiores que o limite
+    if df.empty or COLUNA_CARIMBO not in df.columns:
+        return pd.DataFrame({'inicio': [], 'fim': [], 'horas': []})
+    carimbos = df[COLUNA_CARIMBO].to_numpy()
+    intervalos = np.diff(carimbos)
+    grandes = np.flatnonzero(intervalos > np.timedelta64(int(horas * 3600), 's'))
+    return pd.DataFrame({
+        'inicio': carimbos[grandes],
+        'fim': carimbos[grandes + 1],
+        'horas': intervalos[grandes] / np.timedelta64(1, 'h')
+    })
+
+
+def relatorio(df, horas=LACUNA_HORAS):
+    flags = _flags(df)
+    if flags is None:
+        flags = np.zeros(len(df), dtype='uint8')
+    return {
+        'registros': len(df),
+        'sinalizados': int(np.count_nonzero(flags)),
+        'contagens': {bit: int(np.count_nonzero(flags & bit)) for bit in DESCRICOES},
+        'lacunas': lacunas(df, horas)
+    }
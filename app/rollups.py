@@ -0,0 +1,203 @@
+import json
+import os
+import threading
+
+import numpy as np  # type: ignore
+import pandas as pd  # type: ignore
+
+from ingestion import gravar_json, gravar_parquet
+from quality import chuva_valida, nivel_valido, registro_valido
+
+COLUNA_CARIMBO = 'Carimbo de data/hora'
+COLUNAS_CONTAGEM = ['NOME', 'Assoreamento [Nova]', 'Captação [Gradeamento]']
+
+_AGREGACOES = {
+    'nivel_soma': 'sum',
+    'nivel_n': 'sum',
+    'nivel_min': 'min',
+    'nivel_max': 'max',
+    'chuva_soma': 'sum',
+    'registros': 'sum'
+}
+
+
+def _agregar_dias(df):
+    # Duplicados não contam; medições sinalizadas na ingestão ficam fora das estatísticas (mas contam como registro)
+    df = df[registro_valido(df)]
+    dias = df[COLUNA_CARIMBO].dt.normalize()
+    # Somas em float64: as colunas de medição são float32 e acumulam anos de registros
+    nivel = df['Nível do Rio (m)'].astype('float64') if 'Nível do Rio (m)' in df.columns else pd.Series(np.nan, index=df.index)
+    chuva = df['Chuva (mm)'].astype('float64') if 'Chuva (mm)' in df.columns else pd.Series(np.nan, index=df.index)
+    base = pd.DataFrame({'DIA': dias, 'nivel': nivel.where(nivel_valido(df)), 'chuva': chuva.where(chuva_valida(df))})
+    diario = base.groupby('DIA').agg(
+        nivel_soma=('nivel', 'sum'),
+        nivel_n=('nivel', 'count'),
+        nivel_min=('nivel', 'min'),
+        nivel_max=('nivel', 'max'),
+        chuva_soma=('chuva', 'sum'),
+        registros=('DIA', 'size')
+    )
+
+    contagens = []
+    for coluna in COLUNAS_CONTAGEM:
+        if coluna not in df.columns:
+            continue
+        parte = pd.DataFrame({'DIA': dias, 'valor': df[coluna].astype(object)}).dropna(subset=['valor'])
+        parte = parte.groupby(['DIA', 'valor']).size().rename('registros').reset_index()
+        parte.insert(1, 'coluna', coluna)
+        contagens.append(parte)
+    contagens = pd.concat(contagens, ignore_index=True) if contagens else _contagens_vazias()
+    return diario, contagens
+
+
+def _diario_vazio():
+    diario = pd.DataFrame(columns=list(_AGREGACOES), dtype=float)
+    diario.index = pd.DatetimeIndex([], name='DIA')
+    return diario
+
+
+def _contagens_vazias():
+    return pd.DataFrame({
+        'DIA': pd.Series(dtype='datetime64[ns]'),
+        'coluna': pd.Series(dtype=object),
+        'valor': pd.Series(dtype=object),
+        'registros': pd.Series(dtype='int64')
+    })
+
+
+def _substituir_diario(antigo, novo, dias):
+    # Os dias recalculados substituem os antigos por inteiro
+    return pd.concat([antigo.drop(antigo.index.intersection(dias)), novo]).sort_index()
+
+
+def _substituir_contagens(antiga, nova, dias):
+    return pd.concat([antiga[~antiga['DIA'].isin(dias)], nova], ignore_index=True).sort_values('DIA', kind='stable', ignore_index=True)
+
+
+class StationRollup:
+    # Agregados diários e mensais de uma estação, atualizados apenas com os dias que receberam linhas novas
+    def __init__(self):
+        self.diario = _diario_vazio()
+        self.contagens = _contagens_vazias()
+        self.ultimo_carimbo = None
+        self.linhas = 0
+        self.geracao = None
+        self._lock = threading.Lock()
+
+    def atualizar(self, df):
+        # df deve estar ordenado por data; as linhas até o último carimbo já processado são ignoradas
+        if df.empty or COLUNA_CARIMBO not in df.columns:
+            return self
+        # Geração do snapshot (ingestion): muda quando a planilha é reprocessada do zero
+        geracao = df.attrs.get('geracao')
+        with self._lock:
+            carimbos = df[COLUNA_CARIMBO].values
+            inicio = 0
+            if self.ultimo_carimbo is not None:
+                if geracao is not None and self.geracao is not None and geracao != self.geracao:
+                    if geracao < self.geracao:
+                        # df de antes do último reprocessamento (cache da página): nada novo
+                        return self
+                    # Histórico editado, mesmo com a mesma contagem de linhas (valor corrigido)
+                    reconstruir = True
+                elif carimbos[-1] < np.datetime64(self.ultimo_carimbo):
+                    # df mais antigo que o já agregado (cache da página x modo ao vivo): nada novo
+                    return self
+                else:
+                    inicio = int(np.searchsorted(carimbos, np.datetime64(self.ultimo_carimbo), side='right'))
+                    # Outra contagem até o último carimbo: linha retroativa ou removida
+                    reconstruir = inicio != self.linhas
+                if reconstruir:
+                    self.diario, self.contagens, self.linhas, inicio = _diario_vazio(), _contagens_vazias(), 0, 0
+            if inicio >= len(df):
+                return self
+            if self.linhas:
+                # O dia da última medição já agregada é refeito por inteiro: a qualidade dela só fica
+                # definida com a medição seguinte (um pico é confirmado quando o nível volta)
+                inicio = int(np.searchsorted(carimbos, np.datetime64(self.ultimo_carimbo.normalize()), side='left'))
+
+            recorte = df.iloc[inicio:]
+            dias = pd.DatetimeIndex(recorte[COLUNA_CARIMBO].dt.normalize().unique())
+            diario, contagens = _agregar_dias(recorte)
+            self.diario = diario if self.diario.empty else _substituir_diario(self.diario, diario, dias)
+            self.contagens = contagens if self.contagens.empty else _substituir_contagens(self.contagens, contagens, dias)
+            self.ultimo_carimbo = pd.Timestamp(carimbos[-1])
+            self.linhas = len(df)
+            if geracao is not None:
+                self.geracao = geracao
+        return self
+
+    def diario_intervalo(self, inicio=None, fim=None):
+        diario = self.diario.loc[
+            pd.Timestamp(inicio) if inicio is not None else None:
+            pd.Timestamp(fim) if fim is not None else None
+        ]
+        resultado = diario[['nivel_min', 'nivel_max', 'chuva_soma', 'registros']].copy()
+        resultado.insert(0, 'nivel_media', diario['nivel_soma'] / diario['nivel_n'].replace(0, np.nan))
+        return resultado
+
+    def mensal(self):
+        # Meses sem registros aparecem com chuva zero e nível ausente, como no resample('ME')
+        if self.diario.empty:
+            return pd.DataFrame(columns=['nivel_media', 'nivel_min', 'nivel_max', 'chuva_soma', 'registros'])
+        mensal = self.diario.groupby(self.diario.index.to_period('M')).agg(_AGREGACOES)
+        mensal = mensal.reindex(pd.period_range(mensal.index.min(), mensal.index.max(), freq='M'))
+        resultado = pd.DataFrame({
+            'nivel_media': mensal['nivel_soma'] / mensal['nivel_n'].replace(0, np.nan),
+            'nivel_min': mensal['nivel_min'],
+            'nivel_max': mensal['nivel_max'],
+            'chuva_soma': mensal['chuva_soma'].fillna(0),
+            'registros': mensal['registros'].fillna(0).astype('int64')
+        })
+        resultado.index.name = 'MES'
+        return resultado
+
+    def contagens_intervalo(self, coluna, inicio=None, fim=None):
+        contagens = self.contagens[self.contagens['coluna'] == coluna]
+        if inicio is not None:
+            contagens = contagens[contagens['DIA'] >= pd.Timestamp(inicio)]
+        if fim is not None:
+            contagens = contagens[contagens['DIA'] <= pd.Timestamp(fim)]
+        return contagens.groupby('valor')['registros'].sum().sort_values(ascending=False)
+
+    def resumo(self, inicio=None, fim=None):
+        diario = self.diario.loc[
+            pd.Timestamp(inicio) if inicio is not None else None:
+            pd.Timestamp(fim) if fim is not None else None
+        ]
+        nivel_n = diario['nivel_n'].sum()
+        return {
+            'nivel_medio': diario['nivel_soma'].sum() / nivel_n if nivel_n else np.nan,
+            'nivel_min': diario['nivel_min'].min(),
+            'nivel_max': diario['nivel_max'].max(),
+            'chuva_total': diario['chuva_soma'].sum(),
+            'registros': int(diario['registros'].sum())
+        }
+
+    def salvar(self, diretorio):
+        # Cada arquivo entra no lugar de uma vez; o meta.json, lido primeiro, é gravado por último
+        os.makedirs(diretorio, exist_ok=True)
+        gravar_parquet(self.diario, os.path.join(diretorio, 'rollup_diario.parquet'))
+        contagens = self.contagens.copy()
+        contagens['valor'] = contagens['valor'].astype(str)
+        gravar_parquet(contagens, os.path.join(diretorio, 'rollup_contagens.parquet'), index=False)
+        gravar_json({
+            'ultimo_carimbo': self.ultimo_carimbo.isoformat() if self.ultimo_carimbo is not None else None,
+            'linhas': self.linhas,
+            'geracao': self.geracao
+        }, os.path.join(diretorio, 'rollup_meta.json'))
+
+    @classmethod
+    def carregar(cls, diretorio):
+        rollup = cls()
+        caminho_meta = os.path.join(diretorio, 'rollup_meta.json')
+        if not os.path.exists(caminho_meta):
+            return rollup
+        with open(caminho_meta, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        rollup.diario = pd.read_parquet(os.path.join(diretorio, 'rollup_diario.parquet'))
+        rollup.contagens = pd.read_parquet(os.path.join(diretorio, 'rollup_contagens.parquet'))
+        rollup.ultimo_carimbo = pd.Timestamp(meta['ultimo_carimbo']) if meta['ultimo_carimbo'] else None
+        rollup.linhas = meta['linhas']
+        rollup.geracao = meta.get('geracao')
+        return rollup
@@ -2,24 +2,42 @@ import streamlit as st  # type: ignore
 import pandas as pd  # type: ignore
 import plotly.express as px  # type: ignore
 import plotly.graph_objects as go  # type: ignore
-from plotly.subplots import make_subplots  # type: ignore
 from datetime import datetime
-from prophet import Prophet # type: ignore
 import traceback
 import requests # type: ignore
-import io
-
-st.set_page_config(
-    page_title="Monitoramento Hidrológico",
-    layout="wide",
-    page_icon="🌊"
-)
-
-def mes_ano_extenso(mes, ano):
-    meses = ['01', '02', '03', '04', '05', '06', '07', '08', '09', '10', '11', '12']
-    return f'{ano}-{meses[mes - 1]}'
-
-st.markdown("""
+import os
+import pipeline
+import artifacts
+from alerts import criar_notificadores
+from pipeline import sheet_config
+from forecast_cache import ForecastCache, fingerprint_serie
+from forecast_worker import ForecastWorker
+from live_feed import LiveFeed
+from nowcast import NowcastARX, serie_horaria
+from rollups import StationRollup
+from time_index import PERIODOS
+from downsampling import reduzir_serie
+import tabela
+import quality
+from profiling import Profiler, anotar, ativar, desativar, etapa, span, tamanho_figura
+
+# Com ARTEFATOS_DIR definido a página só lê o que o precompute.py gerou, sem baixar planilhas nem ajustar modelos
+ARTEFATOS_DIR = os.environ.get("ARTEFATOS_DIR")
+# Intervalo, em segundos, entre consultas do modo ao vivo
+LIVE_INTERVAL = int(os.environ.get("LIVE_INTERVAL_SECONDS", "30"))
+# Intervalo do precompute.py; no modo de artefatos é ele que define de quanto em quanto tempo surgem dados novos
+PRECOMPUTE_INTERVAL = int(os.environ.get("PRECOMPUTE_INTERVAL_SECONDS", "600"))
+# Motor de previsão selecionado por padrão: "nowcast" (próximas horas) ou "prophet" (próximos meses)
+FORECAST_ENGINE = os.environ.get("FORECAST_ENGINE", "prophet")
+
+def configurar_pagina():
+    st.set_page_config(
+        page_title="Monitoramento Hidrológico",
+        layout="wide",
+        page_icon="🌊"
+    )
+
+    st.markdown("""
     <style>
         .stApp {
             background-color: #0E1117;
@@ -56,103 +74,605 @@ st.markdown("""
     </script>
 """, unsafe_allow_html=True)
 
-st.markdown("""
+    st.markdown("""
             <p class="version"> Versão 1.0.0 </p>
             """ , unsafe_allow_html=True)
 
-sheet_config = {
-    "ETA Cubatão": {
-        "SHEET_ID": "1AUdMkuChcjdMmvQw_j_0z2MAgLhvfVeZZLZxnG9YETg",
-        "GID": "487419985"
-    },
-    "ETA Pirai": {
-        "SHEET_ID": "13mElwgzhSr8ljUrIu_klMsO3rBLtzDF8fYt6aEOOnDg",
-        "GID": "1698452995"
+@st.cache_resource
+def get_forecast_cache():
+    # Compartilhado entre sessões e reruns; o diretório opcional persiste os modelos entre reinícios
+    return ForecastCache(
+        max_entries=int(os.environ.get("FORECAST_CACHE_MAX_ENTRIES", "16")),
+        cache_dir=os.environ.get("FORECAST_CACHE_DIR") or None
+    )
+
+@st.cache_resource
+def get_rollup(station):
+    # Um rollup por estação, compartilhado entre sessões e atualizado só com as linhas novas
+    return StationRollup()
+
+@st.cache_resource
+def get_live_feed(station):
+    # Uma consulta por intervalo por estação, independente de quantas sessões estão no modo ao vivo
+    config = sheet_config[station]
+    return LiveFeed(config["SHEET_ID"], config["GID"], intervalo=LIVE_INTERVAL)
+
+@st.cache_resource
+def get_alertas(station):
+    # Estado das janelas de alerta por estação; cada avaliação percorre só as linhas novas
+    return pipeline.criar_alertas(station, criar_notificadores())
+
+@st.cache_resource
+def get_nowcast(station):
+    # Um modelo por estação, compartilhado entre sessões e atualizado só com as horas novas
+    return NowcastARX()
+
+@st.cache_resource
+def get_forecast_worker():
+    max_workers = os.environ.get("FORECAST_WORKERS")
+    return ForecastWorker(
+        cache=get_forecast_cache(),
+        max_workers=int(max_workers) if max_workers else None
+    )
+
+def render_forecast_chart(df_prophet, forecast, title, yaxis_title):
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=df_prophet['ds'], y=df_prophet['y'],
+                             mode='lines+markers', name='Dados Históricos'))
+    fig.add_trace(go.Scatter(x=forecast['ds'], y=forecast['yhat'],
+                             mode='lines', name='Previsão'))
+    fig.add_trace(go.Scatter(x=forecast['ds'], y=forecast['yhat_upper'],
+                             mode='lines', name='Limite Superior', line=dict(dash='dash')))
+    fig.add_trace(go.Scatter(x=forecast['ds'], y=forecast['yhat_lower'],
+                             mode='lines', name='Limite Inferior', line=dict(dash='dash')))
+    fig.update_layout(
+        template="plotly_dark",
+        title=title,
+        xaxis_title="Data",
+        yaxis_title=yaxis_title,
+        hovermode="x unified"
+    )
+    return fig
+
+# cache_resource devolve os mesmos DataFrames para todas as sessões, sem a cópia por rerun do
+# cache_data; o resultado é somente leitura e as fatias por período são views sobre ele.
+# Todas as estações são carregadas juntas, em paralelo: a espera fica limitada pela mais lenta
+@st.cache_resource(ttl=3600)
+def load_all_stations(estacoes):
+    # Só as linhas novas desde a última ingestão são processadas; o histórico vem do armazenamento local
+    return pipeline.carregar_todas({nome: {"SHEET_ID": sheet_id, "GID": gid} for nome, sheet_id, gid in estacoes})
+
+def station_keys():
+    return tuple((nome, config["SHEET_ID"], config["GID"]) for nome, config in sheet_config.items())
+
+def load_sheet_data(station):
+    resultado = load_all_stations(station_keys())[station]
+    erro = resultado['erro']
+    if isinstance(erro, requests.RequestException):
+        st.error(f"Erro ao acessar a planilha: {str(erro)}")
+    elif erro is not None:
+        st.error(f"Erro ao processar os dados: {str(erro)}")
+        st.code(''.join(traceback.format_exception(erro)), language='bash')
+    return resultado['df']
+
+# A versão (data do manifesto) faz parte da chave: artefatos novos invalidam o cache sozinhos
+@st.cache_resource(max_entries=8)
+def load_artifacts(sheet_id, gid, versao):
+    config = {"SHEET_ID": sheet_id, "GID": gid}
+    return {
+        "df": artifacts.ler_dados(ARTEFATOS_DIR, config),
+        "rollup": artifacts.ler_rollup(ARTEFATOS_DIR, config),
+        "previsoes": artifacts.ler_previsoes(ARTEFATOS_DIR, config),
+        "alertas": artifacts.ler_alertas(ARTEFATOS_DIR, config)
     }
-}
 
-@st.cache_data(ttl=3600)
-def load_sheet_data(sheet_id, gid):
-    try:
-        url = f"https://docs.google.com/spreadsheets/d/{sheet_id}/export?format=csv&gid={gid}"
-        response = requests.get(url)
-        response.raise_for_status()
-        print(response.headers.get('Content-Type'))
-        df = pd.read_csv(io.BytesIO(response.content), encoding='utf-8')
-        
-        if 'Carimbo de data/hora' in df.columns:
-            df['Carimbo de data/hora'] = pd.to_datetime(df['Carimbo de data/hora'], dayfirst=True)
-            df['DATA'] = df['Carimbo de data/hora'].dt.strftime('%d/%m/%Y')
-            df['HORA'] = df['Carimbo de data/hora'].dt.strftime('%H:%M')
-            df = df.sort_values(by='Carimbo de data/hora', ascending=True)
+def artifacts_version(config):
+    caminho = os.path.join(artifacts.diretorio_estacao(ARTEFATOS_DIR, config), "manifesto.json")
+    return os.path.getmtime(caminho) if os.path.exists(caminho) else None
+
+def station_rollup(station):
+    # Rollup diário de uma estação para a comparação; None quando não há dados utilizáveis
+    config = sheet_config[station]
+    if ARTEFATOS_DIR:
+        versao = artifacts_version(config)
+        return load_artifacts(config["SHEET_ID"], config["GID"], versao)["rollup"] if versao is not None else None
+    df = load_sheet_data(station)
+    if df.empty or pipeline.colunas_faltando(df):
+        return None
+    return pipeline.agregar(df, get_rollup(station))
+
+def exibir_grafico(fig, nome, **kwargs):
+    # Fecha a etapa de montagem da figura e mede a serialização/envio separadamente
+    pontos = sum(len(trace.x) for trace in fig.data if getattr(trace, "x", None) is not None)
+    etapa(f"figura:{nome}", pontos=pontos)
+    with span(f"render:{nome}") as registro:
+        registro['payload_bytes'] = tamanho_figura(fig)
+        st.plotly_chart(fig, **kwargs)
+
+def resumo_alertas(station, df, artefatos=None):
+    # No modo de artefatos os alertas já foram avaliados pelo precompute
+    if ARTEFATOS_DIR:
+        return artefatos.get("alertas") if artefatos else None
+    alertas = get_alertas(station)
+    with span("alertas"):
+        alertas.avaliar(df)
+    return alertas.resumo()
+
+def exibir_alertas(resumo):
+    if not resumo:
+        return
+    for alerta in resumo['ativos']:
+        st.error(f"🚨 {alerta['mensagem']} - desde {pd.Timestamp(alerta['carimbo']).strftime('%d/%m/%Y %H:%M')}")
+    if resumo['historico']:
+        with st.expander(f"🔔 Histórico de alertas ({len(resumo['historico'])})", expanded=False):
+            historico = pd.DataFrame(resumo['historico'][::-1])
+            historico['carimbo'] = pd.to_datetime(historico['carimbo']).dt.strftime('%d/%m/%Y %H:%M')
+            st.dataframe(
+                historico[['carimbo', 'estado', 'mensagem']].rename(columns={
+                    'carimbo': 'Medição',
+                    'estado': 'Estado',
+                    'mensagem': 'Alerta'
+                }),
+                use_container_width=True,
+                hide_index=True
+            )
 
-        if 'Nível do Rio (m)' in df.columns:
-            df['Nível do Rio (m)'] = df['Nível do Rio (m)'].str.replace('m', '')  # Remover "m"
-            df['Nível do Rio (m)'] = pd.to_numeric(df['Nível do Rio (m)'].str.replace(',', '.'), errors='coerce')  # Convertendo para numérico
+def exibir_qualidade(recorte):
+    # Contagens por bit da coluna QUALIDADE e lacunas entre medições, só no período selecionado
+    relatorio = quality.relatorio(recorte)
+    lacunas = relatorio['lacunas']
+    titulo = f"🧪 Qualidade dos Dados ({relatorio['sinalizados']} registros sinalizados, {len(lacunas)} lacunas)"
+    with st.expander(titulo, expanded=False):
+        colunas = st.columns(len(quality.DESCRICOES))
+        for coluna, (bit, descricao) in zip(colunas, quality.DESCRICOES.items()):
+            with coluna:
+                st.metric(descricao.capitalize(), relatorio['contagens'][bit])
+        st.caption(
+            f"Medições sinalizadas ficam fora das médias, gráficos e previsões (dos alertas, só as fora da faixa e duplicadas). Um pico é confirmado quando a medição seguinte volta ao nível anterior. "
+            f"Nível válido: acima de 0 e até {quality.NIVEL_MAXIMO:.0f} m; chuva: de 0 a {quality.CHUVA_MAXIMA:.0f} mm."
+        )
+        if not lacunas.empty:
+            st.dataframe(
+                pd.DataFrame({
+                    'Início': lacunas['inicio'].dt.strftime('%d/%m/%Y %H:%M'),
+                    'Fim': lacunas['fim'].dt.strftime('%d/%m/%Y %H:%M'),
+                    'Horas sem medição': lacunas['horas'].round(1)
+                }).sort_values('Horas sem medição', ascending=False),
+                use_container_width=True,
+                hide_index=True
+            )
+            st.caption(f"Intervalos sem medições acima de {quality.LACUNA_HORAS} horas.")
 
+def exibir_painel_desempenho(perfil):
+    with st.sidebar.expander("⏱️ Desempenho", expanded=False):
+        st.metric("Tempo total", f"{perfil.total_ms():.0f} ms")
+        spans = pd.DataFrame(perfil.registros())
+        if not spans.empty:
+            spans['nome'] = ['  ' * nivel + nome for nivel, nome in zip(spans['nivel'], spans['nome'])]
+            st.dataframe(spans.drop(columns=['nivel']), use_container_width=True, hide_index=True)
 
-        if 'Chuva (mm)' in df.columns:
-            df['Chuva (mm)'] = df['Chuva (mm)'].str.replace('mm', '')  # Remover "mm"
-            df['Chuva (mm)'] = pd.to_numeric(df['Chuva (mm)'].astype(str).str.replace(',', '.'), errors='coerce')
+def main():
+    # Painel de desempenho: ADMIN_PROFILING=1 ou ?admin=1 na URL; METRICS_LOG grava cada execução em JSON lines
+    admin = os.environ.get("ADMIN_PROFILING") == "1" or st.query_params.get("admin") == "1"
+    metrics_log = os.environ.get("METRICS_LOG")
+    configurar_pagina()
+    perfil = Profiler(medir_payload=admin or bool(metrics_log))
+    token = ativar(perfil)
+    try:
+        render_dashboard()
+    finally:
+        desativar(token)
 
-        return df
+    if metrics_log:
+        try:
+            perfil.gravar(metrics_log)
+        except OSError as e:
+            print(f"Erro ao gravar métricas: {e}")
+    if admin:
+        exibir_painel_desempenho(perfil)
+
+def descrever_intervalo(segundos):
+    return f"{segundos // 60} min" if segundos >= 60 and segundos % 60 == 0 else f"{segundos} s"
+
+def painel_ao_vivo(station):
+    # Re-executado sozinho a cada LIVE_INTERVAL segundos (st.fragment): consulta só as linhas novas
+    # e redesenha apenas este painel, sem reconstruir o resto da página
+    with span("ao_vivo") as registro:
+        if ARTEFATOS_DIR:
+            config = sheet_config[station]
+            versao = artifacts_version(config)
+            if versao is None:
+                return
+            artefatos = load_artifacts(config["SHEET_ID"], config["GID"], versao)
+            df, consultado_em, erro = artefatos["df"], versao, None
+            alertas = resumo_alertas(station, df, artefatos)
+        else:
+            feed = get_live_feed(station)
+            df = feed.atualizar()
+            consultado_em, erro = feed.consultado_em, feed.erro
+            if df is None:
+                st.error(f"Erro ao acessar a planilha: {str(erro)}")
+                return
+            # O rollup e os alertas compartilhados recebem só as linhas novas
+            pipeline.agregar(df, get_rollup(station))
+            alertas = resumo_alertas(station, df)
+        registro['linhas'] = len(df)
+        nowcast = get_nowcast(station).atualizar(df).prever(6)
+
+    # Medições novas desde que esta sessão ativou o modo ao vivo, e desde a consulta anterior
+    estado = st.session_state.setdefault(f"ao_vivo:{station}", {"inicial": len(df), "anterior": len(df)})
+    novas_ciclo = max(len(df) - estado["anterior"], 0)
+    estado["anterior"] = len(df)
+
+    janela = pipeline.indexar(df).ultimas(24)
+    validas = janela[quality.nivel_valido(janela)]
+
+    st.header("🔴 Ao Vivo")
+    exibir_alertas(alertas)
+    col1, col2, col3, col4, col5 = st.columns(5)
+    with col1:
+        if len(validas) >= 2:
+            niveis = validas['Nível do Rio (m)'].iloc[-2:]
+            st.metric("Nível Atual", f"{niveis.iloc[-1]:.2f} m", f"{niveis.iloc[-1] - niveis.iloc[0]:+.2f} m")
+        elif len(validas):
+            st.metric("Nível Atual", f"{validas['Nível do Rio (m)'].iloc[-1]:.2f} m")
+        else:
+            st.metric("Nível Atual", "Sem medições nas últimas 24 horas")
+    with col2:
+        chuva_24h = janela['Chuva (mm)'][quality.chuva_valida(janela)].sum() if 'Chuva (mm)' in janela.columns else 0
+        st.metric("Chuva (24h)", f"{chuva_24h:.1f} mm")
+    with col3:
+        st.metric("Novas Medições", max(len(df) - estado["inicial"], 0), novas_ciclo or None)
+    with col4:
+        ultima = df['Carimbo de data/hora'].iloc[-1] if not df.empty else None
+        st.metric("Última Medição", ultima.strftime('%d/%m %H:%M') if ultima is not None else "-")
+    with col5:
+        if nowcast is not None:
+            st.metric("Previsão (+6h)", f"{max(nowcast['yhat'].iloc[-1], 0):.2f} m")
+        else:
+            st.metric("Previsão (+6h)", "-")
+
+    if not validas.empty:
+        nivel_plot = reduzir_serie(validas, "Carimbo de data/hora", "Nível do Rio (m)", 500)
+        fig = go.Figure()
+        fig.add_trace(go.Scatter(
+            x=nivel_plot["Carimbo de data/hora"],
+            y=nivel_plot["Nível do Rio (m)"],
+            mode="lines+markers",
+            name="Nível do Rio (m)",
+            hovertemplate="Data: %{x}<br>Nível: %{y:.2f} m"
+        ))
+        if 'Chuva (mm)' in janela.columns:
+            chuva_plot = reduzir_serie(janela, "Carimbo de data/hora", "Chuva (mm)", 500)
+            fig.add_trace(go.Bar(
+                x=chuva_plot["Carimbo de data/hora"],
+                y=chuva_plot["Chuva (mm)"],
+                name="Chuva (mm)",
+                yaxis="y2",
+                opacity=0.5,
+                hovertemplate="Data: %{x}<br>Chuva: %{y:.2f} mm"
+            ))
+        fig.update_layout(
+            title="Últimas 24 horas",
+            template="plotly_dark",
+            height=320,
+            hovermode="x unified",
+            yaxis=dict(title="Nível do Rio (m)"),
+            yaxis2=dict(title="Chuva (mm)", overlaying="y", side="right", showgrid=False),
+            legend=dict(orientation="h", y=1.1)
+        )
+        exibir_grafico(fig, "ao_vivo", use_container_width=True)
 
-    except requests.RequestException as e:
-        st.error(f"Erro ao acessar a planilha: {str(e)}")
-        return pd.DataFrame()
+    if consultado_em and ARTEFATOS_DIR:
+        st.caption(
+            f"Dados do pré-processamento das {datetime.fromtimestamp(consultado_em).strftime('%H:%M:%S')}. "
+            f"As planilhas são consultadas a cada {descrever_intervalo(PRECOMPUTE_INTERVAL)}."
+        )
+    elif consultado_em:
+        st.caption(f"Consultado às {datetime.fromtimestamp(consultado_em).strftime('%H:%M:%S')}. Atualização automática a cada {LIVE_INTERVAL} s.")
+    if erro is not None:
+        st.warning(f"Falha na última consulta, exibindo os dados anteriores: {str(erro)}")
+
+def render_previsao_prophet(station, df, rollup, artefatos):
+    # Longo prazo: Prophet sobre as séries mensais, ajustado em segundo plano pelo ForecastWorker
+    previsoes = {}
+    try:
+        if ARTEFATOS_DIR:
+            previsoes = artefatos["previsoes"]
+        else:
+            # Os dois ajustes são enviados juntos ao pool e rodam em paralelo
+            worker = get_forecast_worker()
+            for variavel, df_prophet in pipeline.series_mensais(rollup).items():
+                previsoes[variavel] = (df_prophet, worker.request(station, variavel, df_prophet))
+            # As demais estações entram no mesmo pool: ao trocar de estação a previsão já está pronta
+            carregadas = load_all_stations(station_keys())
+            for outra in sheet_config:
+                if outra == station or carregadas[outra]['erro'] is not None:
+                    continue
+                df_outra = carregadas[outra]['df']
+                if df_outra.empty or pipeline.colunas_faltando(df_outra):
+                    continue
+                for variavel, df_prophet in pipeline.series_mensais(pipeline.agregar(df_outra, get_rollup(outra))).items():
+                    worker.request(outra, variavel, df_prophet)
     except Exception as e:
-        st.error(f"Erro ao processar os dados: {str(e)}")
-        st.code(traceback.format_exc(), language='bash')
-        return pd.DataFrame()
+        st.error(f"Erro ao agendar previsões: {str(e)}")
+
+    etapa("previsoes:agendamento")
+
+    for variavel, titulo in [('Chuva (mm)', "Previsão de Chuva"), ('Nível do Rio (m)', "Previsão de Nível do Rio")]:
+        st.header(f"📈 {titulo}")
+        if variavel not in previsoes:
+            continue
+        df_prophet, resultado = previsoes[variavel]
+        erro = None if ARTEFATOS_DIR else get_forecast_worker().store.error((station, variavel))
+        if resultado is None:
+            if erro:
+                st.error(f"Erro ao gerar {titulo.lower()}: {erro}")
+            elif ARTEFATOS_DIR:
+                # O precompute ajusta as previsões antes de gravar os artefatos: sem o arquivo, elas não
+                # serão geradas (--sem-previsao ou falha no ajuste, registrada no log do serviço)
+                st.info("Previsões não geradas pelo pré-processamento (precompute.py com --sem-previsao ou falha no ajuste).")
+            else:
+                st.info("Previsão em processamento. Ela será exibida na próxima atualização da página.")
+            continue
 
-def main():
+        try:
+            forecast = resultado['forecast'].copy()
+            forecast['yhat'] = forecast['yhat'].clip(lower=0).round(2)
+            exibir_grafico(render_forecast_chart(df_prophet, forecast, titulo, variavel), f"previsao:{variavel}", use_container_width=True)
+
+            atualizado_em = datetime.fromtimestamp(resultado['updated_at']).strftime('%d/%m/%Y %H:%M')
+            if resultado['fingerprint'] != fingerprint_serie(df_prophet):
+                st.caption(f"Previsão de {atualizado_em}. Uma atualização está em processamento.")
+            else:
+                st.caption(f"Previsão gerada em {atualizado_em}.")
+        except Exception as e:
+            st.error(f"Erro ao gerar {titulo.lower()}: {str(e)}")
+
+def render_nowcast(station, df, rollup, artefatos):
+    # Curto prazo: ARX horário com a chuva como entrada; ajusta em milissegundos e, depois do primeiro
+    # ajuste, só as horas novas atualizam o modelo compartilhado da estação
+    st.header("📈 Previsão de Nível do Rio (próximas horas)")
+    horas = int(os.environ.get("NOWCAST_HOURS", "24"))
+    modelo = get_nowcast(station).atualizar(df)
+    forecast = modelo.prever(horas)
+    etapa("nowcast", observacoes=modelo.observacoes)
+    if forecast is None:
+        st.info("Ainda não há medições horárias suficientes para a previsão de curto prazo.")
+        return
+    historico = serie_horaria(pipeline.indexar(df).ultimas(72))['nivel'].dropna()
+    df_historico = pd.DataFrame({'ds': historico.index, 'y': historico.values})
+    for coluna in ['yhat', 'yhat_lower', 'yhat_upper']:
+        forecast[coluna] = forecast[coluna].clip(lower=0).round(2)
+    fig = render_forecast_chart(df_historico, forecast, f"Previsão de Nível do Rio - próximas {horas} horas", "Nível do Rio (m)")
+    exibir_grafico(fig, "previsao:nowcast", use_container_width=True)
+    st.caption(
+        f"Modelo autorregressivo horário com a chuva como entrada, atualizado com {modelo.observacoes} horas de medições. "
+        "Supõe que não haverá chuva adicional no horizonte da previsão."
+    )
+
+# Motores de previsão selecionáveis na barra lateral: chave -> (rótulo, função que desenha a seção)
+MOTORES_PREVISAO = {
+    "nowcast": ("Curto prazo (próximas horas)", render_nowcast),
+    "prophet": ("Prophet (próximos 12 meses)", render_previsao_prophet)
+}
+
+def render_tabela(station, serie, start_date, end_date, operadores):
+    # Executado como fragmento: paginar, ordenar e filtrar re-executam só esta seção.
+    # Só a página visível é formatada e enviada; o recorte vem do índice temporal, sem copiar o histórico
+    st.header("📁 Dados Completos")
+    periodo = f"{start_date}:{end_date}"
+    col1, col2, col3, col4 = st.columns([2, 2, 2, 1])
+    with col1:
+        datas = st.date_input(
+            "Datas",
+            [start_date, end_date],
+            min_value=start_date,
+            max_value=end_date,
+            key=f"tabela_datas:{periodo}"
+        )
+    with col2:
+        selecionados = st.multiselect("Operadores", operadores, key=f"tabela_operadores:{periodo}")
+    with col3:
+        colunas = [serie.coluna] + [coluna for coluna in serie.df.columns if coluna != serie.coluna]
+        coluna = st.selectbox("Ordenar por", colunas, key="tabela_ordem")
+    with col4:
+        tamanho = st.selectbox("Linhas por página", [50, 100, 500, 1000], key="tabela_tamanho")
+    crescente = st.toggle("Ordem crescente", key="tabela_crescente")
+
+    if isinstance(datas, (list, tuple)) and len(datas) == 2:
+        inicio, fim = datas
+    else:
+        inicio, fim = start_date, end_date
+
+    with span("tabela") as registro:
+        recorte = serie.intervalo(inicio, fim)
+        posicoes = tabela.ordenar(recorte, tabela.posicoes_filtradas(recorte, selecionados), coluna, crescente)
+        total_paginas = max(1, -(-len(posicoes) // tamanho))
+        filtros = (station, inicio, fim, tuple(selecionados), coluna, crescente, tamanho)
+        numero = st.number_input(
+            f"Página (de {total_paginas})",
+            min_value=1,
+            max_value=total_paginas,
+            value=1,
+            key=f"tabela_pagina:{hash(filtros)}"
+        )
+        numero = min(int(numero), total_paginas)
+        pagina_df = tabela.pagina(recorte, posicoes, numero, tamanho)
+        registro['linhas'] = len(pagina_df)
+        st.dataframe(pagina_df, use_container_width=True, height=400, hide_index=True)
+
+    if len(posicoes):
+        primeira = (numero - 1) * tamanho + 1
+        st.caption(f"Registros {primeira} a {primeira + len(pagina_df) - 1} de {len(posicoes)}.")
+    else:
+        st.caption("Nenhum registro com os filtros atuais.")
+
+    # A exportação só é gerada quando pedida, e fica na sessão enquanto os filtros não mudam
+    exportacao = st.session_state.get("tabela_exportacao")
+    col1, col2, col3 = st.columns([1, 1, 4])
+    for coluna_botao, formato in [(col1, "csv"), (col2, "parquet")]:
+        with coluna_botao:
+            if st.button(f"Preparar {formato.upper()}", disabled=not len(posicoes), key=f"tabela_preparar_{formato}"):
+                with span(f"exportacao:{formato}", linhas=len(posicoes)):
+                    exportar = tabela.exportar_csv if formato == "csv" else tabela.exportar_parquet
+                    exportacao = (filtros, formato, exportar(recorte, posicoes))
+                st.session_state["tabela_exportacao"] = exportacao
+    if exportacao is not None and exportacao[0] == filtros:
+        _, formato, dados = exportacao
+        with col3:
+            st.download_button(
+                f"⬇️ Baixar {formato.upper()} ({len(dados) / 1e6:.1f} MB)",
+                data=dados,
+                file_name=f"{station}_{inicio:%Y%m%d}_{fim:%Y%m%d}.{formato}",
+                mime="text/csv" if formato == "csv" else "application/octet-stream"
+            )
+
+def render_comparacao():
+    st.header("🔀 Comparação entre Estações")
+
+    periodos = list(PERIODOS)[1:] + ["Todo o histórico"]
+    selected_period = st.sidebar.radio("Selecione o Perído", periodos, index=1)
+    end_date = datetime.now().date()
+    start_date = (datetime.now() - pd.Timedelta(days=PERIODOS[selected_period])).date() if selected_period in PERIODOS else None
+
+    with st.spinner("Carregando dados..."), span("carga") as registro:
+        rollups = {station: station_rollup(station) for station in sheet_config}
+        rollups = {station: rollup for station, rollup in rollups.items() if rollup is not None}
+        registro['estacoes'] = len(rollups)
+    faltando = [station for station in sheet_config if station not in rollups]
+    if faltando:
+        st.warning(f"Sem dados para: {', '.join(faltando)}")
+    if not rollups:
+        return
+
+    # Séries diárias lado a lado, uma linha por estação; o rollup já tem as médias e somas por dia
+    diarios = []
+    resumos = []
+    for station, rollup in rollups.items():
+        diario = rollup.diario_intervalo(start_date, end_date).reset_index()
+        diario.insert(0, 'Estação', station)
+        diarios.append(diario)
+        resumo = rollup.resumo(start_date, end_date)
+        resumos.append({
+            'Estação': station,
+            'Nível Médio (m)': round(resumo['nivel_medio'], 2),
+            'Nível Máximo (m)': resumo['nivel_max'],
+            'Chuva Total (mm)': round(resumo['chuva_total'], 1),
+            'Registros': resumo['registros'],
+            'Última Medição': rollup.ultimo_carimbo.strftime('%d/%m/%Y %H:%M') if rollup.ultimo_carimbo is not None else '-'
+        })
+    comparacao = pd.concat(diarios, ignore_index=True)
+    etapa("comparacao", linhas=len(comparacao))
+
+    st.dataframe(pd.DataFrame(resumos), use_container_width=True, hide_index=True)
+
+    if comparacao.empty:
+        st.warning("Nenhum registro encontrado com os filtros atuais!")
+        return
+
+    fig = px.line(
+        comparacao.dropna(subset=['nivel_media']),
+        x='DIA',
+        y='nivel_media',
+        color='Estação',
+        title="Nível do Rio por Estação (média diária)",
+        labels={'DIA': 'Data', 'nivel_media': 'Nível do Rio (m)'}
+    )
+    fig.update_layout(template="plotly_dark", hovermode="x unified")
+    exibir_grafico(fig, "comparacao:nivel", use_container_width=True)
+
+    fig = px.bar(
+        comparacao,
+        x='DIA',
+        y='chuva_soma',
+        color='Estação',
+        barmode='group',
+        title="Chuva por Estação (total diário)",
+        labels={'DIA': 'Data', 'chuva_soma': 'Chuva (mm)'}
+    )
+    fig.update_layout(template="plotly_dark", hovermode="x unified")
+    exibir_grafico(fig, "comparacao:chuva", use_container_width=True)
+
+def render_dashboard():
     st.title("🌊 Monitoramento Hidrológico em Tempo Real")
+
+    if len(sheet_config) > 1 and st.sidebar.toggle("Comparar estações"):
+        anotar(estacao="comparacao")
+        try:
+            render_comparacao()
+        except Exception as e:
+            st.error(f"Erro na aplicação: {str(e)}")
+            st.code(traceback.format_exc(), language='bash')
+        return
     
     selected_station = st.sidebar.radio("Selecione a Estação", list(sheet_config.keys()))
     st.sidebar.write(f"Estação selecionada: **{selected_station}**")
+    anotar(estacao=selected_station)
+    if ARTEFATOS_DIR:
+        ajuda_ao_vivo = (
+            f"Exibe as medições gravadas pelo pré-processamento, que consulta as planilhas a cada "
+            f"{descrever_intervalo(PRECOMPUTE_INTERVAL)}, e atualiza apenas o painel ao vivo."
+        )
+    else:
+        ajuda_ao_vivo = f"Consulta novas medições a cada {LIVE_INTERVAL} segundos e atualiza apenas o painel ao vivo."
+    ao_vivo = st.sidebar.toggle("🔴 Ao vivo", help=ajuda_ao_vivo)
     
+    config = sheet_config[selected_station]
+
     if st.button("🔄 Atualizar Dados"):
-        st.cache_data.clear()
+        # Recarrega todas as estações em paralelo; cada uma processa só as linhas novas
+        # e planilhas sem alteração respondem com 304
+        load_all_stations.clear()
         st.rerun()
     
-    config = sheet_config[selected_station]
-    
     try:
-        with st.spinner("Carregando dados..."):
-            df = load_sheet_data(config["SHEET_ID"], config["GID"])
+        with st.spinner("Carregando dados..."), span("carga") as registro:
+            if ARTEFATOS_DIR:
+                versao = artifacts_version(config)
+                if versao is None:
+                    st.warning("Os dados desta estação ainda não foram pré-processados. Tente novamente em alguns minutos.")
+                    return
+                artefatos = load_artifacts(config["SHEET_ID"], config["GID"], versao)
+                df = artefatos["df"]
+            else:
+                df = load_sheet_data(selected_station)
+                if ao_vivo:
+                    # O feed ao vivo pode já ter linhas mais novas que o cache da página
+                    df = get_live_feed(selected_station).iniciar(df).df if not df.empty else df
+            registro['linhas'] = len(df)
         
         if df.empty:
             st.warning("Nenhum dado encontrado na planilha!")
             return
 
-        required_cols = ['Carimbo de data/hora', 'NOME', 'Nível do Rio (m)']
-        missing_cols = [col for col in required_cols if col not in df.columns]
+        missing_cols = pipeline.colunas_faltando(df)
         if missing_cols:
             st.error(f"Colunas obrigatórias faltando: {', '.join(missing_cols)}")
             return
 
+        if ARTEFATOS_DIR:
+            rollup = artefatos["rollup"]
+        else:
+            rollup = pipeline.agregar(df, get_rollup(selected_station))
+        etapa("rollup", dias=len(rollup.diario))
+
+        if ao_vivo:
+            # Os alertas são avaliados e exibidos dentro do painel ao vivo
+            st.fragment(run_every=LIVE_INTERVAL)(painel_ao_vivo)(selected_station)
+            etapa("ao_vivo")
+        else:
+            exibir_alertas(resumo_alertas(selected_station, df, artefatos if ARTEFATOS_DIR else None))
+
         time_options = ["Período personalizado", "Últimas 24 horas", "Últimos 7 dias", "Últimos 30 dias", "Ultimo Ano"]
         selected_time_period = st.sidebar.radio("Selecione o Perído", time_options)
 
-        min_date = df['Carimbo de data/hora'].min().date()
-        max_date = df['Carimbo de data/hora'].max().date()
-        current_date = datetime.now().date()
+        serie = pipeline.indexar(df)
+        min_date = serie.inicio.date()
+        max_date = serie.fim.date()
 
-        if selected_time_period == "Últimas 24 horas":
-            start_date = (datetime.now() - pd.Timedelta(days=1)).date()
-            end_date = current_date
-            date_range = [start_date, end_date]
-        elif selected_time_period == "Últimos 7 dias":
-            start_date = (datetime.now() - pd.Timedelta(days=7)).date()
-            end_date = current_date
-            date_range = [start_date, end_date]
-        elif selected_time_period == "Últimos 30 dias":
-            start_date = (datetime.now() - pd.Timedelta(days=30)).date()
-            end_date = current_date
-            date_range = [start_date, end_date]
-        elif selected_time_period == "Ultimo Ano":
-            start_date = (datetime.now() - pd.Timedelta(days=365)).date()
-            end_date = current_date
+        if selected_time_period in PERIODOS:
+            start_date, end_date = serie.periodo(selected_time_period)
             date_range = [start_date, end_date]
         else:
             date_range = st.sidebar.date_input(
@@ -162,7 +682,7 @@ def main():
                 max_value=max_date
             )
             
-        if isinstance(date_range, list) and len(date_range) == 2:
+        if isinstance(date_range, (list, tuple)) and len(date_range) == 2:
             start_date, end_date = date_range
         else:
             start_date = min_date
@@ -175,59 +695,72 @@ def main():
             "Modo de Visualização do Gráfico Temporal", 
             ["Detalhado", "Agregado (média diária)"]
         )
+        motores = list(MOTORES_PREVISAO)
+        motor = st.sidebar.selectbox(
+            "Motor de Previsão",
+            motores,
+            index=motores.index(FORECAST_ENGINE) if FORECAST_ENGINE in motores else 0,
+            format_func=lambda chave: MOTORES_PREVISAO[chave][0]
+        )
+        if view_mode == "Detalhado":
+            max_points = st.sidebar.number_input(
+                "Pontos por série no gráfico",
+                min_value=100,
+                max_value=50000,
+                value=int(os.environ.get("MAX_CHART_POINTS", "2000")),
+                step=100,
+                help="Períodos com mais medições são reduzidos por LTTB, preservando picos. Selecione um período menor para ver todos os pontos."
+            )
         
-        filtered_df = df[
-            (df['Carimbo de data/hora'].dt.date >= date_range[0]) &
-            (df['Carimbo de data/hora'].dt.date <= date_range[1])
-        ]
+        # Fatia contígua por busca binária; df já está em ordem crescente de data
+        filtered_df = serie.intervalo(start_date, end_date)
+        etapa("filtro", linhas=len(filtered_df))
         
         if filtered_df.empty:
             st.warning("Nenhum registro encontrado com os filtros atuais!")
             return
 
-        filtered_df = filtered_df.sort_values('Carimbo de data/hora', ascending=False)
-        filtered_df_valid = filtered_df[filtered_df['Nível do Rio (m)'] != 0].copy()
+        # Medições sinalizadas na ingestão (fora da faixa, picos, duplicadas) ficam fora dos gráficos
+        filtered_df_valid = filtered_df[quality.nivel_valido(filtered_df)]
+
+        resumo = rollup.resumo(start_date, end_date)
 
         st.header("📊 Indicadores Principais")
         col1, col2, col3, col4 = st.columns(4)
         with col1:
-            nivel_medio = filtered_df_valid['Nível do Rio (m)'].mean()
-            st.metric("Nível Médio", f"{nivel_medio:.2f} m")
+            st.metric("Nível Médio", f"{resumo['nivel_medio']:.2f} m")
         with col2:
             if not filtered_df_valid.empty:
-                ultimo_nivel = filtered_df_valid.iloc[0]['Nível do Rio (m)']
+                ultimo_nivel = filtered_df_valid['Nível do Rio (m)'].iloc[-1]
                 st.metric("Última Medição", f"{ultimo_nivel:.2f} m")
             else:
                 st.metric("Última Medição", "Dados inconsistentes")
         with col3:
-            st.metric("Total de Registros", len(filtered_df))
+            st.metric("Total de Registros", resumo['registros'])
         with col4:
-            st.metric("Operadores Ativos", len(filtered_df['NOME'].unique()))
+            st.metric("Operadores Ativos", len(rollup.contagens_intervalo('NOME', start_date, end_date)))
+
+        exibir_qualidade(filtered_df)
 
         st.markdown("""
         <p class="custom-text">Desenvolvido por: <a href="https://fabricadesoftware.ifc.edu.br/" target="_blank">Fabrica De Software</a> <br/> Professor Responsável: <a href="https://github.com/ldmfabio" target="_blank">Fábio Longo De Moura</a> <br/> Alunos: <a href="https://github.com/jonatasperaza" target="_blank">Jonatas Peraza</a></p>
     """, unsafe_allow_html=True)
 
-        st.header("📈 Análise Temporal")
+        etapa("indicadores")
 
-        current_time = pd.Timestamp.now()
-        time_filter = filtered_df_valid['Carimbo de data/hora'].min()
-        filtered_df_valid = filtered_df_valid[filtered_df_valid['Carimbo de data/hora'] >= time_filter]
+        st.header("📈 Análise Temporal")
 
         if view_mode == "Agregado (média diária)":
-            # Em vez de agrupar por ["DATA", "NOME"], faça apenas:
-            agg_df = filtered_df_valid.groupby("DATA", as_index=False).agg({
-                "Nível do Rio (m)": ["mean", "min", "max"]
+            # Médias diárias lidas do rollup, já ordenadas por dia
+            agg_df = rollup.diario_intervalo(start_date, end_date).dropna(subset=['nivel_media'])
+            agg_df = agg_df.reset_index().rename(columns={
+                'DIA': 'Carimbo de data/hora',
+                'nivel_media': 'media',
+                'nivel_min': 'minimo',
+                'nivel_max': 'maximo'
             })
-            agg_df.columns = ["DATA", "media", "minimo", "maximo"]
-
-            # Converter a coluna DATA para datetime no formato DD/MM/YYYY
-            agg_df["Carimbo de data/hora"] = pd.to_datetime(agg_df["DATA"], format='%d/%m/%Y')
 
-            # Ordenar por data para não “pular” pontos
-            agg_df = agg_df.sort_values("Carimbo de data/hora")
-
-            plot_data= agg_df.copy()
+            plot_data = agg_df
 
             fig = px.line(
                 agg_df,
@@ -242,13 +775,18 @@ def main():
                 }
             )
         else:
-            plot_data = filtered_df_valid.copy()
+            # Leitura apenas: as séries reduzidas são fatias novas e o recorte do período não é copiado
+            plot_data = filtered_df_valid
+            # Cada série é reduzida separadamente antes de montar os traces, para não enviar milhares de pontos ao navegador
+            nivel_plot = reduzir_serie(plot_data, "Carimbo de data/hora", "Nível do Rio (m)", max_points)
             if "Chuva (mm)" in plot_data.columns:
+                from plotly.subplots import make_subplots  # type: ignore
+                chuva_plot = reduzir_serie(plot_data, "Carimbo de data/hora", "Chuva (mm)", max_points)
                 fig = make_subplots(specs=[[{"secondary_y": True}]])
                 fig.add_trace(
                     go.Scatter(
-                        x=plot_data["Carimbo de data/hora"],
-                        y=plot_data["Nível do Rio (m)"],
+                        x=nivel_plot["Carimbo de data/hora"],
+                        y=nivel_plot["Nível do Rio (m)"],
                         mode="lines",
                         name="Nível do Rio (m)",
                         hovertemplate="Data: %{x}<br>Nível: %{y:.2f} m"
@@ -257,8 +795,8 @@ def main():
                 )
                 fig.add_trace(
                     go.Scatter(
-                        x=plot_data["Carimbo de data/hora"],
-                        y=plot_data["Chuva (mm)"],
+                        x=chuva_plot["Carimbo de data/hora"],
+                        y=chuva_plot["Chuva (mm)"],
                         mode="lines",
                         name="Chuva (mm)",
                         hovertemplate="Data: %{x}<br>Chuva: %{y:.2f} mm"
@@ -305,8 +843,10 @@ def main():
                     secondary_y=True
                 )
             else:
+                # Texto da hora gerado só para os pontos exibidos
+                nivel_plot = nivel_plot.assign(HORA=nivel_plot["Carimbo de data/hora"].dt.strftime('%H:%M'))
                 fig = px.line(
-                    plot_data,
+                    nivel_plot,
                     x='Carimbo de data/hora',
                     y='Nível do Rio (m)',
                     title="Variação do Nível do Rio (valores zero ignorados)",
@@ -318,8 +858,13 @@ def main():
                     }
                 )
                 fig.update_layout(template="plotly_dark")
+            if len(nivel_plot) < plot_data["Nível do Rio (m)"].count():
+                st.caption(
+                    f"Exibindo {len(nivel_plot)} de {plot_data['Nível do Rio (m)'].count()} medições de nível. "
+                    "Selecione um período menor para ver a resolução completa."
+                )
         
-        st.plotly_chart(fig, use_container_width=True)
+        exibir_grafico(fig, "temporal", use_container_width=True)
 
         st.subheader("📊 Estatísticas do Período")
         col1, col2, col3 = st.columns(3)
@@ -339,27 +884,31 @@ def main():
                 f"{plot_data['Nível do Rio (m)' if view_mode != 'Agregado (média diária)' else 'minimo'].min():.2f} m"
             )
 
+        etapa("estatisticas")
+
         st.header("📌 Distribuição de Dados")
         col5, col6 = st.columns(2)
         with col5:
             if 'Assoreamento [Nova]' in filtered_df.columns:
+                status_counts = rollup.contagens_intervalo('Assoreamento [Nova]', start_date, end_date)
                 fig_pie = px.pie(
-                    filtered_df,
-                    names='Assoreamento [Nova]',
+                    names=status_counts.index,
+                    values=status_counts.values,
                     title="Status de Assoreamento"
                 )
                 fig_pie.update_layout(template="plotly_dark")
-                st.plotly_chart(fig_pie, use_container_width=True)
+                exibir_grafico(fig_pie, "status", use_container_width=True)
             elif 'Captação [Gradeamento]' in filtered_df.columns:
+                status_counts = rollup.contagens_intervalo('Captação [Gradeamento]', start_date, end_date)
                 fig_pie = px.pie(
-                    filtered_df,
-                    names='Captação [Gradeamento]',
+                    names=status_counts.index,
+                    values=status_counts.values,
                     title="Status de Captação"
                 )
                 fig_pie.update_layout(template="plotly_dark")
-                st.plotly_chart(fig_pie, use_container_width=True)
+                exibir_grafico(fig_pie, "status", use_container_width=True)
         with col6:
-            df_counts = filtered_df['NOME'].value_counts().reset_index()
+            df_counts = rollup.contagens_intervalo('NOME', start_date, end_date).reset_index()
             df_counts.columns = ['Operador', 'Registros']
             fig_bar = px.bar(
                 df_counts,
@@ -369,19 +918,11 @@ def main():
                 labels={'Operador': 'Operador', 'Registros': 'Registros'}
             )
             fig_bar.update_layout(template="plotly_dark")
-            st.plotly_chart(fig_bar, use_container_width=True)
+            exibir_grafico(fig_bar, "operadores", use_container_width=True)
 
-        filtered_df = df.drop(columns=['Carimbo de data/hora'], errors='ignore', inplace=False)
-
-        filtered_df['DATA_ORDENACAO'] = pd.to_datetime(filtered_df['DATA'], format='%d/%m/%Y')
-        sorted_df = filtered_df.sort_values(by='DATA_ORDENACAO', ascending=False)
-        sorted_df['DATA'] = sorted_df['DATA_ORDENACAO'].dt.strftime('%d/%m/%Y')
-        sorted_df = sorted_df.drop(columns=['DATA_ORDENACAO'])
-        if 'Carimbo de data/hora' in df.columns:
-            sorted_df['MES_ANO'] = df.apply(lambda row: mes_ano_extenso(row['Carimbo de data/hora'].month, row['Carimbo de data/hora'].year), axis=1)
-        sorted_df = sorted_df
-
-        df_mm_mes = sorted_df.groupby(['MES_ANO'])['Chuva (mm)'].sum()
+        mensal = rollup.mensal()
+        df_mm_mes = mensal['chuva_soma'].rename('Chuva (mm)')
+        df_mm_mes.index = mensal.index.strftime('%Y-%m')
 
         fig = px.bar(
                 df_mm_mes,
@@ -398,110 +939,14 @@ def main():
             ),
         )
 
-        st.plotly_chart(fig, use_container_width=True)
-
+        exibir_grafico(fig, "chuva_por_mes", use_container_width=True)
 
-        try:
-            df['data'] = pd.to_datetime(df['Carimbo de data/hora'])
-
-            df_mensal = df.resample('ME', on='data')['Chuva (mm)'].sum().reset_index()
-
-            df_prophet = df_mensal.rename(columns={'data': 'ds', 'Chuva (mm)': 'y'})
-         
-            model = Prophet()
-
-            model.fit(df_prophet)
+        render_previsao = MOTORES_PREVISAO[motor][1]
+        with span(f"previsao:{motor}"):
+            render_previsao(selected_station, df, rollup, artefatos if ARTEFATOS_DIR else None)
 
-            future = model.make_future_dataframe(periods=12, freq='ME')
-
-            forecast = model.predict(future)
-
-            forecast['yhat'] = forecast['yhat'].clip(lower=0).round(2)
-
-            fig = go.Figure()
-
-            fig.add_trace(go.Scatter
-                (x=df_prophet['ds'], y=df_prophet['y'],
-                mode='lines+markers', name='Dados Históricos'))
-            
-            fig.add_trace(go.Scatter
-                (x=forecast['ds'], y=forecast['yhat'],
-                mode='lines', name='Previsão'))
-            
-            fig.add_trace(go.Scatter
-                (x=forecast['ds'], y=forecast['yhat_upper'],
-                mode='lines', name='Limite Superior', line=dict(dash='dash')))
-            
-            fig.add_trace(go.Scatter
-                (x=forecast['ds'], y=forecast['yhat_lower'],
-                mode='lines', name='Limite Inferior', line=dict(dash='dash')))
-            
-            fig.update_layout(
-                template="plotly_dark",
-                title="Previsão de Chuva",
-                xaxis_title="Data",
-                yaxis_title="Chuva (mm)",
-                hovermode="x unified"
-            )
-
-            st.header("📈 Previsão de Chuva")
-
-            st.plotly_chart(fig, use_container_width=True)
-
-        except:
-            st.error("Erro ao gerar previsão de chuva")
-
-        try:
-            df['data'] = pd.to_datetime(df['Carimbo de data/hora'])
-
-            df_mensal = df.resample('ME', on='data')['Nível do Rio (m)'].mean().reset_index()
-
-            df_prophet = df_mensal.rename(columns={'data': 'ds', 'Nível do Rio (m)': 'y'})
-         
-            model = Prophet()
-
-            model.fit(df_prophet)
-
-            future = model.make_future_dataframe(periods=12, freq='ME')
-            forecast = model.predict(future)
-
-            forecast['yhat'] = forecast['yhat'].clip(lower=0).round(2)
-
-            fig = go.Figure()
-            fig.add_trace(go.Scatter(x=df_prophet['ds'], y=df_prophet['y'],
-                         mode='lines+markers', name='Dados Históricos'))
-
-
-            fig.add_trace(go.Scatter(x=forecast['ds'], y=forecast['yhat'],
-                                    mode='lines', name='Previsão'))
-
-
-            fig.add_trace(go.Scatter(x=forecast['ds'], y=forecast['yhat_upper'],
-                                    mode='lines', name='Limite Superior', line=dict(dash='dash')))
-            fig.add_trace(go.Scatter(x=forecast['ds'], y=forecast['yhat_lower'],
-                                    mode='lines', name='Limite Inferior', line=dict(dash='dash')))
-
-            fig.update_layout(
-                template="plotly_dark",
-                title="Previsão de Nível do Rio",
-                xaxis_title="Data",
-                yaxis_title="Nível do Rio (m)",
-                hovermode="x unified"
-            )
-
-            st.header("📈 Previsão de Nível do Rio")
-
-            st.plotly_chart(fig)
-
-        except Exception as e:
-            st.error(f"Erro ao gerar previsão de nível do rio: {str(e)}")
-
-        st.header("📁 Dados Completos")
-        st.dataframe(
-            sorted_df,
-            use_container_width=True,
-            height=400
-        )
+        operadores = list(rollup.contagens_intervalo('NOME', start_date, end_date).index)
+        st.fragment(render_tabela)(selected_station, serie, start_date, end_date, operadores)
         
     except Exception as e:
         st.error(f"Erro na aplicação: {str(e)}")
@@ -0,0 +1,51 @@
+import io
+
+import numpy as np  # type: ignore
+import pyarrow as pa  # type: ignore
+import pyarrow.parquet as pq  # type: ignore
+
+from functions import formatar_tabela
+
+COLUNA_CARIMBO = 'Carimbo de data/hora'
+
+
+def posicoes_filtradas(df, operadores=None):
+    # df é o recorte do período (fatia do índice temporal); o filtro de operador compara códigos da category
+    if not operadores or 'NOME' not in df.columns:
+        return np.arange(len(df))
+    return np.flatnonzero(df['NOME'].isin(operadores).to_numpy())
+
+
+def ordenar(df, posicoes, coluna=COLUNA_CARIMBO, crescente=False):
+    # Por data o recorte já está em ordem: basta inverter, sem ordenar
+    if coluna == COLUNA_CARIMBO:
+        return posicoes if crescente else posicoes[::-1]
+    valores = df[coluna].iloc[posicoes].reset_index(drop=True)
+    ordem = valores.sort_values(ascending=crescente, na_position='last', kind='stable').index.to_numpy()
+    return posicoes[ordem]
+
+
+def pagina(df, posicoes, numero, tamanho):
+    # Só as linhas da página são copiadas e formatadas para envio ao navegador
+    inicio = (numero - 1) * tamanho
+    return formatar_tabela(df.iloc[posicoes[inicio:inicio + tamanho]])
+
+
+def exportar_csv(df, posicoes, tamanho_bloco=50000):
+    # Em blocos, para não montar uma cópia formatada do período inteiro de uma vez
+    saida = io.BytesIO()
+    for inicio in range(0, len(posicoes), tamanho_bloco):
+        bloco = df.iloc[posicoes[inicio:inicio + tamanho_bloco]]
+        saida.write(bloco.to_csv(index=False, header=inicio == 0, date_format='%d/%m/%Y %H:%M:%S').encode('utf-8'))
+    return saida.getvalue()
+
+
+def exportar_parquet(df, posicoes, tamanho_bloco=50000):
+    # Um row group por bloco; os tipos (datetime, category, float32) são preservados
+    saida = io.BytesIO()
+    schema = pa.Schema.from_pandas(df.iloc[:0], preserve_index=False)
+    with pq.ParquetWriter(saida, schema) as writer:
+        for inicio in range(0, len(posicoes), tamanho_bloco):
+            bloco = df.iloc[posicoes[inicio:inicio + tamanho_bloco]]
+            writer.write_table(pa.Table.from_pandas(bloco, schema=schema, preserve_index=False))
+    return saida.getvalue()
@@ -0,0 +1,20 @@
+# Os módulos do app são importados pelo nome, como no container (WORKDIR /app)
+import os
+import sys
+
+import pandas as pd  # type: ignore
+import pytest  # type: ignore
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def medicoes():
+    # Medições já limpas (como saem da ingestão), uma a cada freq; sem chuva se ela não for informada
+    def criar(niveis, chuva=None, inicio='2026-01-01', freq='h'):
+        return pd.DataFrame({
+            'Carimbo de data/hora': pd.date_range(inicio, periods=len(niveis), freq=freq),
+            'Nível do Rio (m)': pd.Series(niveis, dtype='float32'),
+            'Chuva (mm)': pd.Series(chuva if chuva is not None else [0.0] * len(niveis), dtype='float32')
+        })
+    return criar
@@ -0,0 +1,34 @@
+import pandas as pd  # type: ignore
+
+from alerts import AlertEngine
+
+
+def ativacoes(eventos):
+    return [evento for evento in eventos if evento['estado'] == 'ativo']
+
+
+def test_frame_antigo_nao_repete_alerta(medicoes):
+    # Sessões fora do modo ao vivo trazem o df em cache (antigo); as do modo ao vivo, o mais novo
+    eventos = []
+    motor = AlertEngine('Estação', {'nivel_maximo': 2.5, 'subida_metros': None, 'chuva_mm': None}, [eventos.extend])
+    antigo = medicoes([1.0] * 10)
+    novo = medicoes([1.0] * 10 + [3.0, 3.1])
+    motor.avaliar(antigo)
+    for _ in range(3):
+        motor.avaliar(novo)
+        motor.avaliar(antigo)
+    assert len(ativacoes(eventos)) == 1
+    assert [alerta['regra'] for alerta in motor.resumo()['ativos']] == ['nivel_maximo']
+
+
+def test_historico_editado_nao_repete_alerta_ativo(medicoes):
+    eventos = []
+    motor = AlertEngine('Estação', {'nivel_maximo': 2.5, 'subida_metros': None, 'chuva_mm': None}, [eventos.extend])
+    motor.avaliar(medicoes([1.0] * 10))
+    df = medicoes([1.0] * 10 + [3.0, 3.1])
+    motor.avaliar(df)
+    # Uma linha antiga removida na planilha e uma medição nova
+    editado = pd.concat([df.drop(index=2), medicoes([3.2], inicio='2026-01-01 12:00')], ignore_index=True)
+    motor.avaliar(editado)
+    assert len(ativacoes(eventos)) == 1
+
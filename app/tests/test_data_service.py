@@ -0,0 +1,70 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest  # type: ignore
+
+from data_service import SheetFetcher
+
+CONTEUDO = 'Carimbo de data/hora,NOME\n01/01/2026 00:00:00,Ana\n'.encode('utf-8')
+
+
+class PlanilhaStub(BaseHTTPRequestHandler):
+    # Responde como o export CSV do Google Sheets: ETag, 304 condicional e um atraso para sobrepor as consultas
+    requisicoes = []
+    atraso = 0.0
+
+    def do_GET(self):
+        self.requisicoes.append(dict(self.headers))
+        time.sleep(self.atraso)
+        if self.headers.get('If-None-Match') == '"v1"':
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('ETag', '"v1"')
+        self.send_header('Content-Length', str(len(CONTEUDO)))
+        self.end_headers()
+        self.wfile.write(CONTEUDO)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def servidor():
+    PlanilhaStub.requisicoes = []
+    PlanilhaStub.atraso = 0.0
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), PlanilhaStub)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{httpd.server_address[1]}/planilha.csv'
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_uma_requisicao_em_voo_por_url(servidor):
+    PlanilhaStub.atraso = 0.3
+    fetcher = SheetFetcher(janela_coalescencia=0)
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        resultados = list(executor.map(lambda _: fetcher.fetch(servidor), range(8)))
+    assert resultados == [CONTEUDO] * 8
+    assert len(PlanilhaStub.requisicoes) == 1
+    assert fetcher.requisicoes == 1
+
+
+def test_304_reaproveita_o_conteudo_anterior(servidor):
+    fetcher = SheetFetcher(janela_coalescencia=0)
+    assert fetcher.fetch(servidor) == CONTEUDO
+    assert fetcher.fetch(servidor) == CONTEUDO
+    assert len(PlanilhaStub.requisicoes) == 2
+    assert 'If-None-Match' not in PlanilhaStub.requisicoes[0]
+    assert PlanilhaStub.requisicoes[1]['If-None-Match'] == '"v1"'
+
+
+def test_janela_de_coalescencia_evita_nova_requisicao(servidor):
+    fetcher = SheetFetcher(janela_coalescencia=60)
+    fetcher.fetch(servidor)
+    fetcher.fetch(servidor)
+    assert len(PlanilhaStub.requisicoes) == 1
@@ -0,0 +1,38 @@
+import numpy as np  # type: ignore
+import pandas as pd  # type: ignore
+
+from downsampling import lttb_indices, reduzir_serie
+
+
+def test_lttb_mantem_extremos_e_pontas():
+    for seed in range(50):
+        rng = np.random.default_rng(seed)
+        n = int(rng.integers(10, 3000))
+        limite = int(rng.integers(3, n))
+        x = np.sort(rng.choice(10 ** 7, n, replace=False))
+        y = np.cumsum(rng.normal(0, 1, n))
+        indices = lttb_indices(x, y, limite)
+        assert indices[0] == 0 and indices[-1] == n - 1
+        assert y.argmax() in indices and y.argmin() in indices
+        # Únicos e em ordem: as linhas escolhidas continuam em ordem cronológica
+        assert (np.diff(indices) > 0).all()
+        assert len(indices) <= limite + 1
+
+
+def test_lttb_mantem_pico_isolado():
+    y = np.full(10000, 2.0)
+    y[4321] = 9.5
+    y[4322] = 0.1
+    indices = lttb_indices(np.arange(10000), y, 50)
+    assert 4321 in indices and 4322 in indices
+
+
+def test_reduzir_serie_descarta_ausentes_e_respeita_o_limite():
+    df = pd.DataFrame({
+        'Carimbo de data/hora': pd.date_range('2026-01-01', periods=1000, freq='h'),
+        'Nível do Rio (m)': np.where(np.arange(1000) % 7 == 0, np.nan, np.sin(np.arange(1000) / 50))
+    })
+    assert len(reduzir_serie(df, 'Carimbo de data/hora', 'Nível do Rio (m)', 5000)) == df['Nível do Rio (m)'].count()
+    reduzido = reduzir_serie(df, 'Carimbo de data/hora', 'Nível do Rio (m)', 100)
+    assert reduzido['Nível do Rio (m)'].notna().all() and len(reduzido) <= 101
+    assert reduzido['Carimbo de data/hora'].is_monotonic_increasing
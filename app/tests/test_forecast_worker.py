@@ -0,0 +1,81 @@
+from concurrent.futures import Future
+
+import pandas as pd  # type: ignore
+
+from forecast_worker import ForecastStore, ForecastWorker
+
+
+class ExecutorManual:
+    # Guarda os envios; o teste decide quando e como cada ajuste termina
+    def __init__(self):
+        self.envios = []
+
+    def submit(self, funcao, *args):
+        future = Future()
+        self.envios.append((future, args))
+        return future
+
+    def shutdown(self, wait=True):
+        pass
+
+
+def serie(valores):
+    return pd.DataFrame({'ds': pd.date_range('2024-01-31', periods=len(valores), freq='ME'), 'y': valores})
+
+
+def previsao(valor):
+    return pd.DataFrame({'ds': [pd.Timestamp('2025-01-31')], 'yhat': [valor]})
+
+
+def test_store_nao_repete_ajuste_em_andamento():
+    store = ForecastStore()
+    assert store.start('k', 'a')
+    assert not store.start('k', 'a')
+    assert store.is_pending('k')
+    store.finish('k', 'a', previsao(1.0), updated_at=10)
+    assert not store.is_pending('k')
+    assert store.latest('k')['updated_at'] == 10
+
+
+def test_worker_envia_uma_vez_e_entrega_resultado():
+    executor = ExecutorManual()
+    worker = ForecastWorker(executor=executor)
+    dados = serie([1.0, 2.0, 3.0])
+
+    assert worker.request('Estação', 'Chuva (mm)', dados) is None
+    assert worker.request('Estação', 'Chuva (mm)', dados) is None
+    assert len(executor.envios) == 1
+
+    future, _ = executor.envios[0]
+    future.set_result(('{}', previsao(4.0)))
+    resultado = worker.request('Estação', 'Chuva (mm)', dados)
+    assert resultado['forecast']['yhat'].iloc[0] == 4.0
+    assert len(executor.envios) == 1
+
+
+def test_worker_mantem_ultimo_resultado_durante_atualizacao():
+    executor = ExecutorManual()
+    worker = ForecastWorker(executor=executor)
+    worker.request('Estação', 'Chuva (mm)', serie([1.0, 2.0]))
+    executor.envios[0][0].set_result(('{}', previsao(1.0)))
+
+    resultado = worker.request('Estação', 'Chuva (mm)', serie([1.0, 2.0, 5.0]))
+    assert resultado['forecast']['yhat'].iloc[0] == 1.0
+    assert len(executor.envios) == 2
+
+
+def test_worker_nao_reenvia_serie_que_falhou():
+    executor = ExecutorManual()
+    worker = ForecastWorker(executor=executor)
+    dados = serie([float('nan'), 1.0])
+
+    worker.request('Estação', 'Nível do Rio (m)', dados)
+    executor.envios[0][0].set_exception(ValueError('Dataframe has less than 2 non-NaN rows.'))
+    for _ in range(5):
+        assert worker.request('Estação', 'Nível do Rio (m)', dados) is None
+    assert len(executor.envios) == 1
+    assert 'less than 2' in worker.store.error(('Estação', 'Nível do Rio (m)'))
+
+    # Dados novos voltam a ser enviados
+    worker.request('Estação', 'Nível do Rio (m)', serie([float('nan'), 1.0, 2.0]))
+    assert len(executor.envios) == 2
@@ -0,0 +1,192 @@
+import os
+
+import pandas as pd  # type: ignore
+from pandas.testing import assert_frame_equal  # type: ignore
+
+import pipeline
+from benchmarks.dados_sinteticos import gerar_csv
+from ingestion import FileSheetSource, StationStore, anexar_linhas, atualizar_estacao, ingerir_novas
+from quality import DUPLICADO
+
+FIM = '2026-01-01 00:00'
+
+
+def planilha(tmp_path, conteudo):
+    caminho = os.path.join(tmp_path, 'planilha.csv')
+    with open(caminho, 'wb') as f:
+        f.write(conteudo)
+    return FileSheetSource(caminho)
+
+
+def dividir(bruto, linhas):
+    # Cabeçalho + primeiras linhas, e o restante como o que o formulário anexa depois
+    partes = bruto.split(b'\n')
+    return b'\n'.join(partes[:linhas + 1]) + b'\n', b'\n'.join(partes[linhas + 1:])
+
+
+def iguais(a, b):
+    assert_frame_equal(a.reset_index(drop=True), b.reset_index(drop=True), check_categorical=False)
+
+
+def test_incremental_igual_a_carga_completa(tmp_path):
+    bruto = gerar_csv(2000, anos=1, fim=FIM)
+    inicio, resto = dividir(bruto, 1500)
+    store = StationStore(os.path.join(tmp_path, 'dados'), 'estacao')
+
+    fonte = planilha(tmp_path, inicio)
+    assert len(atualizar_estacao(fonte, store)) == 1500
+    planilha(tmp_path, inicio + resto)
+    incremental = atualizar_estacao(fonte, store)
+
+    completo = atualizar_estacao(planilha(tmp_path, bruto), StationStore(os.path.join(tmp_path, 'completo'), 'estacao'))
+    iguais(incremental, completo)
+    iguais(store.load(), completo)
+    assert store.load_meta()['linhas'] == 2000
+
+
+def test_ingerir_novas_devolve_so_a_cauda(tmp_path):
+    bruto = gerar_csv(1000, anos=1, fim=FIM)
+    inicio, resto = dividir(bruto, 900)
+    store = StationStore(os.path.join(tmp_path, 'dados'), 'estacao')
+    fonte = planilha(tmp_path, inicio)
+    anterior = atualizar_estacao(fonte, store)
+
+    assert ingerir_novas(fonte, store).empty
+    planilha(tmp_path, inicio + resto)
+    novos = ingerir_novas(fonte, store)
+    assert len(novos) == 100
+
+    completo = atualizar_estacao(planilha(tmp_path, bruto), StationStore(os.path.join(tmp_path, 'completo'), 'estacao'))
+    iguais(pd.concat([anterior, novos]), completo)
+
+
+def test_historico_editado_reprocessa_tudo(tmp_path):
+    bruto = gerar_csv(500, anos=1, fim=FIM)
+    store = StationStore(os.path.join(tmp_path, 'dados'), 'estacao')
+    fonte = planilha(tmp_path, bruto)
+    atualizar_estacao(fonte, store)
+
+    # Uma linha antiga removida na planilha: o trecho já lido mudou
+    linhas = bruto.split(b'\n')
+    editado = b'\n'.join(linhas[:10] + linhas[11:])
+    planilha(tmp_path, editado)
+    assert ingerir_novas(fonte, store) is None
+    assert len(atualizar_estacao(fonte, store)) == 499
+    assert len(store.load()) == 499
+
+
+def test_compactacao_interrompida_nao_perde_nem_duplica(tmp_path):
+    store = StationStore(os.path.join(tmp_path, 'dados'), 'estacao')
+    store.max_lotes_por_particao = 3
+    df = pd.DataFrame({
+        'Carimbo de data/hora': pd.date_range('2026-01-01', periods=10, freq='h'),
+        'Nível do Rio (m)': [float(i) for i in range(10)]
+    })
+    for i in range(4):
+        store.save_meta({'proximo_lote': store.append(df.iloc[i:i + 1])})
+    particao = os.path.join(store.dir, 'mes=2026-01')
+    assert sorted(os.listdir(particao)) == ['compacto-000003.parquet']
+
+    # Interrupção entre mover o compactado e remover os lotes: um lote já compactado sobrou na partição
+    pd.read_parquet(os.path.join(particao, 'compacto-000003.parquet')).iloc[:1].to_parquet(
+        os.path.join(particao, 'lote-000000.parquet'), index=False
+    )
+    store.save_meta({'proximo_lote': store.append(df.iloc[4:5])})
+    assert store.load()['Nível do Rio (m)'].tolist() == [0.0, 1.0, 2.0, 3.0, 4.0]
+
+
+def test_ingerir_novas_recupera_linhas_consumidas_por_outra_ingestao(tmp_path):
+    bruto = gerar_csv(1650, anos=1, fim=FIM)
+    primeiro, _ = dividir(bruto, 1500)
+    segundo, _ = dividir(bruto, 1600)
+    store = StationStore(os.path.join(tmp_path, 'dados'), 'estacao')
+    fonte = planilha(tmp_path, primeiro)
+    ao_vivo = atualizar_estacao(fonte, store)
+
+    # Recarga da página avança o meta.json sem o modo ao vivo saber
+    planilha(tmp_path, segundo)
+    atualizar_estacao(fonte, store)
+    planilha(tmp_path, bruto)
+    novos = ingerir_novas(fonte, store, desde=ao_vivo['Carimbo de data/hora'].iloc[-1], linhas=len(ao_vivo))
+    assert len(novos) == 150
+
+    completo = atualizar_estacao(planilha(tmp_path, bruto), StationStore(os.path.join(tmp_path, 'completo'), 'estacao'))
+    iguais(pd.concat([ao_vivo, novos]), completo)
+
+
+def test_lote_com_status_em_branco_mantem_o_esquema(tmp_path):
+    store = StationStore(os.path.join(tmp_path, 'dados'), 'estacao')
+    carimbos = pd.date_range('2026-01-01', periods=3, freq='h')
+    anteriores = pd.DataFrame({
+        'Carimbo de data/hora': carimbos[:2],
+        'Nível do Rio (m)': pd.Series([1.0, 1.1], dtype='float32'),
+        'Assoreamento [Nova]': pd.Series(['Normal', 'Normal'], dtype='category')
+    })
+    # read_csv devolve float64 (NaN) para uma coluna sem nenhum valor na cauda
+    cauda = pd.DataFrame({'Carimbo de data/hora': carimbos[2:], 'Nível do Rio (m)': [1.2], 'Assoreamento [Nova]': [float('nan')]})
+    store.save_meta({'proximo_lote': store.append(anteriores)})
+    store.save_meta({'proximo_lote': store.append(cauda)})
+    df = store.load()
+    assert isinstance(df['Assoreamento [Nova]'].dtype, pd.CategoricalDtype)
+    assert df['Assoreamento [Nova]'].tolist()[:2] == ['Normal', 'Normal']
+    assert df['Assoreamento [Nova]'].isna().tolist() == [False, False, True]
+    assert df['Nível do Rio (m)'].dtype == 'float32'
+
+
+def test_cauda_com_status_em_branco_junta_com_o_df_anterior(tmp_path):
+    cabecalho = 'Carimbo de data/hora,NOME,Nível do Rio (m),Assoreamento [Nova]\n'
+    inicio = cabecalho + '01/01/2026 00:00:00,Ana,"1,0",Normal\n01/01/2026 01:00:00,Ana,"1,1",Normal\n'
+    cauda = '01/01/2026 02:00:00,Ana,"1,2",\n'
+    store = StationStore(os.path.join(tmp_path, 'dados'), 'estacao')
+    fonte = planilha(tmp_path, inicio.encode())
+    anterior = atualizar_estacao(fonte, store)
+
+    planilha(tmp_path, (inicio + cauda).encode())
+    novos = ingerir_novas(fonte, store, desde=anterior['Carimbo de data/hora'].iloc[-1], linhas=len(anterior))
+    juntos = anexar_linhas(anterior, novos)
+    assert juntos['Assoreamento [Nova]'].tolist()[:2] == ['Normal', 'Normal']
+    assert juntos['Assoreamento [Nova]'].isna().tolist() == [False, False, True]
+
+    # A carga seguinte junta o snapshot gravado com a mesma cauda
+    df = atualizar_estacao(planilha(tmp_path, (inicio + cauda + cauda.replace('02:00', '03:00')).encode()), store)
+    assert df['Assoreamento [Nova]'].isna().tolist() == [False, False, True, True]
+
+
+def test_linhas_retroativas_na_cauda_nao_sao_descartadas(tmp_path, monkeypatch):
+    cabecalho = 'Carimbo de data/hora,NOME,Nível do Rio (m)\n'
+    inicio = cabecalho + '01/01/2026 00:00:00,Ana,"1,0"\n01/01/2026 02:00:00,Ana,"1,2"\n01/01/2026 03:00:00,Ana,"1,3"\n'
+    # Uma linha retroativa e um segundo envio no mesmo segundo da última
+    cauda = '01/01/2026 01:00:00,Bruno,"1,1"\n01/01/2026 03:00:00,Bruno,"1,4"\n'
+    monkeypatch.setenv('SHEET_SOURCE_DIR', str(tmp_path))
+    base = os.path.join(tmp_path, 'dados')
+    store = StationStore(base, 'planilha_0')
+    fonte = FileSheetSource(os.path.join(tmp_path, 'planilha_0.csv'))
+    for conteudo, modo in ((inicio, 'wb'), (cauda, 'ab')):
+        with open(fonte.path, modo) as f:
+            f.write(conteudo.encode())
+        if modo == 'wb':
+            anterior = atualizar_estacao(fonte, store)
+
+    # Modo ao vivo consome a cauda; a carga seguinte lê o snapshot gravado
+    ao_vivo, _ = pipeline.atualizar('planilha', '0', anterior, base)
+    completo = atualizar_estacao(fonte, StationStore(os.path.join(tmp_path, 'completo'), 'estacao'))
+    assert completo['NOME'].tolist() == ['Ana', 'Bruno', 'Ana', 'Ana', 'Bruno']
+    iguais(ao_vivo, completo)
+    iguais(atualizar_estacao(fonte, store), completo)
+
+
+def test_duplicado_dividido_entre_duas_cargas(tmp_path):
+    cabecalho = 'Carimbo de data/hora,NOME,Nível do Rio (m)\n'
+    primeira = cabecalho + '01/01/2026 00:00:00,Ana,"1,0"\n01/01/2026 01:00:00,Ana,"1,1"\n'
+    # Reenvio do formulário para o mesmo carimbo, corrigindo o nível
+    segunda = '01/01/2026 01:00:00,Ana,"1,2"\n01/01/2026 02:00:00,Ana,"1,3"\n'
+    store = StationStore(os.path.join(tmp_path, 'dados'), 'estacao')
+    fonte = planilha(tmp_path, primeira.encode())
+    assert atualizar_estacao(fonte, store)['QUALIDADE'].tolist() == [0, 0]
+
+    planilha(tmp_path, (primeira + segunda).encode())
+    incremental = atualizar_estacao(fonte, store)
+    assert incremental['QUALIDADE'].tolist() == [0, DUPLICADO, 0, 0]
+    # Sem linhas novas, o snapshot gravado é relido e o duplicado continua sinalizado
+    iguais(atualizar_estacao(fonte, store), incremental)
+    iguais(incremental, atualizar_estacao(fonte, StationStore(os.path.join(tmp_path, 'completo'), 'estacao')))
@@ -0,0 +1,26 @@
+import numpy as np  # type: ignore
+
+from nowcast import NowcastARX
+
+
+def resposta_a_chuva(horas, seed=0):
+    # Nível horário que responde à chuva com atraso, mais ruído
+    rng = np.random.default_rng(seed)
+    chuva = np.where(rng.random(horas) < 0.2, rng.gamma(0.8, 8.0, horas), 0.0)
+    resposta = np.convolve(chuva, np.exp(-np.arange(24) / 6.0), mode='full')[:horas] / 20.0
+    return 2.0 + resposta + rng.normal(0, 0.02, horas), chuva
+
+
+def test_ajusta_depois_de_comecar_com_poucas_horas(medicoes):
+    df = medicoes(*resposta_a_chuva(200))
+    modelo = NowcastARX()
+    modelo.atualizar(df.iloc[:20])
+    assert modelo.theta is None and modelo.prever(6) is None
+
+    for fim in range(21, 201):
+        modelo.atualizar(df.iloc[:fim])
+    assert modelo.theta is not None
+    assert len(modelo.prever(6)) == 6
+
+    novo = NowcastARX().atualizar(df)
+    assert modelo.observacoes == novo.observacoes
@@ -0,0 +1,36 @@
+import os
+import time
+
+import pipeline
+from profiling import Profiler, ativar, desativar, etapa, span
+
+CSV = 'Carimbo de data/hora,NOME,Nível do Rio (m)\n01/01/2026 00:00:00,Ana,"1,0"\n01/01/2026 01:00:00,Ana,"1,1"\n'
+
+
+def test_spans_das_estacoes_em_paralelo(tmp_path, monkeypatch):
+    monkeypatch.setenv('SHEET_SOURCE_DIR', str(tmp_path))
+    config = {}
+    for estacao in ('A', 'B', 'C'):
+        with open(os.path.join(tmp_path, f'{estacao}_0.csv'), 'w', encoding='utf-8') as f:
+            f.write(CSV)
+        config[estacao] = {'SHEET_ID': estacao, 'GID': '0'}
+
+    perfil = Profiler()
+    token = ativar(perfil)
+    try:
+        with span('carga'):
+            resultados = pipeline.carregar_todas(config, base_dir=os.path.join(tmp_path, 'dados'))
+        time.sleep(0.01)
+        etapa('depois')
+    finally:
+        desativar(token)
+
+    assert all(resultado['erro'] is None for resultado in resultados.values())
+    niveis = {}
+    for registro in perfil.registros():
+        niveis.setdefault(registro['nome'], set()).add(registro['nivel'])
+    assert niveis['carga'] == {0} and niveis['estacao'] == {1} and niveis['download'] == {2} and niveis['depois'] == {0}
+    assert sorted(registro['estacao'] for registro in perfil.registros() if registro['nome'] == 'estacao') == ['A', 'B', 'C']
+    # A etapa seguinte é medida a partir do fim do span 'carga', não do fim de um span de outra thread
+    carga, depois = [next(r for r in perfil.registros() if r['nome'] == nome) for nome in ('carga', 'depois')]
+    assert abs(depois['inicio_ms'] - (carga['inicio_ms'] + carga['duracao_ms'])) < 1
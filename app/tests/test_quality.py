@@ -0,0 +1,47 @@
+from alerts import AlertEngine
+from ingestion import anexar_linhas
+from quality import PICO_NIVEL, marcar_picos, validar
+
+
+def picos(df):
+    return (df['QUALIDADE'].to_numpy() & PICO_NIVEL) != 0
+
+
+def em_tempo_real(completo):
+    # Uma medição por vez, como no modo ao vivo (pipeline.atualizar)
+    df = marcar_picos(completo.iloc[:1].copy())
+    for i in range(1, len(completo)):
+        df = marcar_picos(anexar_linhas(df, completo.iloc[i:i + 1]), len(df) - 1)
+        yield df
+
+
+def test_subida_rapida_nao_e_pico_e_dispara_alertas_na_hora(medicoes):
+    niveis = [0.8, 0.8, 0.8, 0.9, 2.8, 3.1, 3.3]
+    eventos = []
+    motor = AlertEngine('Estação', {'nivel_maximo': 2.5, 'subida_metros': 0.5, 'subida_horas': 3, 'chuva_mm': None}, [eventos.extend])
+    ativados = {}
+    for df in em_tempo_real(validar(medicoes(niveis, freq='3h'))):
+        for evento in motor.avaliar(df):
+            if evento['estado'] == 'ativo':
+                ativados.setdefault(evento['regra'], evento['carimbo'])
+        assert not picos(df).any()
+    leitura_alta = medicoes(niveis, freq='3h')['Carimbo de data/hora'].iloc[4].isoformat()
+    assert ativados == {'nivel_maximo': leitura_alta, 'subida': leitura_alta}
+
+
+def test_erro_de_digitacao_e_pico_so_depois_da_medicao_seguinte(medicoes):
+    niveis = [3.5, 3.5, 3.6, 3.5, 0.36]
+    df = marcar_picos(validar(medicoes(niveis)))
+    # Última medição pendente: ainda não se sabe se o nível volta
+    assert not picos(df).any()
+    df = marcar_picos(validar(medicoes(niveis + [3.5])))
+    assert picos(df).tolist() == [False, False, False, False, True, False]
+
+
+def test_marcar_picos_incremental_igual_ao_completo(medicoes):
+    niveis = [1.0, 1.1, 1.0, 1.2, 12.0, 1.1, 1.0, 0.1, 1.0, 1.2, 3.0, 3.4, 3.6, 3.5, 0.35, 3.4] * 5
+    for df in em_tempo_real(validar(medicoes(niveis))):
+        pass
+    completo = marcar_picos(validar(medicoes(niveis)))
+    assert picos(df).tolist() == picos(completo).tolist()
+    assert picos(completo).sum() == 15
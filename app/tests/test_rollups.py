@@ -0,0 +1,89 @@
+import io
+import os
+
+import pandas as pd  # type: ignore
+from pandas.testing import assert_frame_equal  # type: ignore
+
+from benchmarks.dados_sinteticos import gerar_csv
+from ingestion import FileSheetSource, StationStore, atualizar_estacao, limpar_dados
+from quality import PICO_NIVEL, chuva_valida, marcar_duplicados, marcar_picos, nivel_valido, registro_valido, validar
+from rollups import StationRollup
+
+
+def planilha(tmp_path, niveis):
+    linhas = ['Carimbo de data/hora,NOME,Nível do Rio (m)']
+    linhas += [f'01/01/2026 {hora:02d}:00:00,Ana,"{str(nivel).replace(".", ",")}"' for hora, nivel in enumerate(niveis)]
+    caminho = os.path.join(tmp_path, 'planilha.csv')
+    with open(caminho, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(linhas) + '\n')
+    return FileSheetSource(caminho)
+
+
+def test_valor_corrigido_no_historico_reconstroi_o_rollup(tmp_path):
+    store = StationStore(os.path.join(tmp_path, 'dados'), 'estacao')
+    rollup = StationRollup()
+    antigo = atualizar_estacao(planilha(tmp_path, [3.0, 3.0, 3.0, 3.0, 3.0]), store)
+    rollup.atualizar(antigo)
+
+    # Mesma contagem de linhas, um valor passado corrigido na planilha: reprocessamento completo
+    corrigido = atualizar_estacao(planilha(tmp_path, [3.0, 3.5, 3.0, 3.0, 3.0]), store)
+    assert rollup.atualizar(corrigido).resumo()['nivel_medio'] == StationRollup().atualizar(corrigido).resumo()['nivel_medio']
+    assert rollup.resumo()['nivel_max'] == 3.5
+    # O df anterior ao reprocessamento (cache de outra sessão) não desfaz a correção
+    assert rollup.atualizar(antigo).resumo()['nivel_max'] == 3.5
+
+
+def test_salvar_e_carregar(tmp_path):
+    df = atualizar_estacao(planilha(tmp_path, [1.0, 2.0, 3.0]), StationStore(os.path.join(tmp_path, 'dados'), 'estacao'))
+    rollup = StationRollup().atualizar(df)
+    diretorio = os.path.join(tmp_path, 'rollup')
+    rollup.salvar(diretorio)
+    rollup.salvar(diretorio)
+    assert sorted(os.listdir(diretorio)) == ['rollup_contagens.parquet', 'rollup_diario.parquet', 'rollup_meta.json']
+    carregado = StationRollup.carregar(diretorio)
+    assert carregado.resumo() == rollup.resumo()
+    assert (carregado.linhas, carregado.geracao) == (rollup.linhas, rollup.geracao)
+
+
+def test_rollup_ignora_frame_antigo(medicoes):
+    rollup = StationRollup()
+    antigo = medicoes([1.0] * 48)
+    novo = medicoes([1.0] * 48 + [2.0] * 24)
+    rollup.atualizar(antigo).atualizar(novo)
+    diario = rollup.diario
+    rollup.atualizar(antigo)
+    assert rollup.diario is diario
+    assert rollup.resumo()['registros'] == 72
+
+
+def agregado_simples(df, chave):
+    # Referência: groupby direto sobre o df completo, com as mesmas regras de qualidade
+    df = df[registro_valido(df)]
+    nivel = df['Nível do Rio (m)'].astype('float64').where(nivel_valido(df))
+    chuva = df['Chuva (mm)'].astype('float64').where(chuva_valida(df))
+    grupos = chave(df['Carimbo de data/hora'])
+    return pd.DataFrame({
+        'nivel_media': nivel.groupby(grupos).mean(),
+        'nivel_min': nivel.groupby(grupos).min(),
+        'nivel_max': nivel.groupby(grupos).max(),
+        'chuva_soma': chuva.groupby(grupos).sum(),
+        'registros': nivel.groupby(grupos).size()
+    })
+
+
+def test_rollup_incremental_igual_ao_groupby():
+    bruto = limpar_dados(pd.read_csv(io.BytesIO(gerar_csv(5000, anos=1, fim='2026-01-01'))))
+    # Vírgula no lugar errado (0,25 em vez de 2,5) na última linha do primeiro corte: o pico só é
+    # confirmado no corte seguinte, depois de o dia já ter sido agregado
+    bruto.loc[1000, 'Nível do Rio (m)'] /= 10
+    rollup = StationRollup()
+    # Cortes no meio do dia, como no modo ao vivo: a qualidade da última medição muda com a seguinte
+    for fim in (1001, 2500, 2503, 4000, 5000):
+        df = marcar_picos(marcar_duplicados(validar(bruto.iloc[:fim].reset_index(drop=True))))
+        rollup.atualizar(df)
+
+    assert df['QUALIDADE'].iloc[1000] & PICO_NIVEL
+    iguais = dict(check_dtype=False, check_names=False, check_freq=False, check_index_type=False, rtol=1e-6)
+    diario = rollup.diario_intervalo()[['nivel_media', 'nivel_min', 'nivel_max', 'chuva_soma', 'registros']]
+    assert_frame_equal(diario, agregado_simples(df, lambda carimbos: carimbos.dt.normalize()), **iguais)
+    assert_frame_equal(rollup.mensal(), agregado_simples(df, lambda carimbos: carimbos.dt.to_period('M')), **iguais)
@@ -0,0 +1,41 @@
+import numpy as np  # type: ignore
+import pandas as pd  # type: ignore
+
+import tabela
+
+
+def recorte():
+    return pd.DataFrame({
+        'Carimbo de data/hora': pd.date_range('2026-01-01', periods=7, freq='h'),
+        'NOME': pd.Series(['Ana', 'Bruno', 'Ana', 'Carlos', 'Ana', 'Bruno', 'Ana'], dtype='category'),
+        'Nível do Rio (m)': pd.Series([2.0, 3.5, np.nan, 3.5, 1.0, 2.5, 3.0], dtype='float32')
+    })
+
+
+def test_ordenar_por_data_inverte_sem_ordenar():
+    df = recorte()
+    posicoes = tabela.posicoes_filtradas(df)
+    assert tabela.ordenar(df, posicoes).tolist() == [6, 5, 4, 3, 2, 1, 0]
+    assert tabela.ordenar(df, posicoes, crescente=True).tolist() == [0, 1, 2, 3, 4, 5, 6]
+
+
+def test_ordenar_por_coluna_com_filtro():
+    df = recorte()
+    # Empates mantêm a ordem cronológica; nível ausente vai para o fim nos dois sentidos
+    todas = tabela.posicoes_filtradas(df)
+    assert tabela.ordenar(df, todas, 'Nível do Rio (m)').tolist() == [1, 3, 6, 5, 0, 4, 2]
+    assert tabela.ordenar(df, todas, 'Nível do Rio (m)', crescente=True).tolist() == [4, 0, 5, 6, 1, 3, 2]
+    # As posições devolvidas são do recorte, não do subconjunto filtrado
+    ana = tabela.posicoes_filtradas(df, ['Ana'])
+    assert ana.tolist() == [0, 2, 4, 6]
+    assert tabela.ordenar(df, ana, 'Nível do Rio (m)').tolist() == [6, 0, 4, 2]
+
+
+def test_pagina_limites():
+    df = recorte()
+    posicoes = tabela.ordenar(df, tabela.posicoes_filtradas(df))
+    paginas = [tabela.pagina(df, posicoes, numero, 3) for numero in (1, 2, 3, 4)]
+    assert [len(pagina) for pagina in paginas] == [3, 3, 1, 0]
+    assert paginas[0]['HORA'].tolist() == ['06:00', '05:00', '04:00']
+    assert paginas[2]['HORA'].tolist() == ['00:00']
+    assert 'Carimbo de data/hora' not in paginas[0].columns
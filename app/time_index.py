@@ -0,0 +1,57 @@
+from datetime import datetime
+
+import numpy as np  # type: ignore
+import pandas as pd  # type: ignore
+
+COLUNA_CARIMBO = 'Carimbo de data/hora'
+
+PERIODOS = {
+    "Últimas 24 horas": 1,
+    "Últimos 7 dias": 7,
+    "Últimos 30 dias": 30,
+    "Ultimo Ano": 365
+}
+
+
+class SerieTemporal:
+    # Acesso por intervalo de datas a um DataFrame já ordenado por carimbo, via busca binária.
+    # As fatias são feitas com iloc sobre posições contíguas, sem máscara nem cópia.
+    def __init__(self, df, coluna=COLUNA_CARIMBO):
+        self.df = df
+        self.coluna = coluna
+        self._carimbos = df[coluna].values if coluna in df.columns else np.array([], dtype='datetime64[ns]')
+
+    def __len__(self):
+        return len(self._carimbos)
+
+    @property
+    def inicio(self):
+        return pd.Timestamp(self._carimbos[0]) if len(self) else None
+
+    @property
+    def fim(self):
+        return pd.Timestamp(self._carimbos[-1]) if len(self) else None
+
+    def posicoes(self, inicio, fim):
+        # Intervalo fechado de datas: [inicio 00:00, fim + 1 dia)
+        esquerda = 0 if inicio is None else np.searchsorted(self._carimbos, np.datetime64(pd.Timestamp(inicio).normalize()), side='left')
+        direita = len(self) if fim is None else np.searchsorted(
+            self._carimbos, np.datetime64(pd.Timestamp(fim).normalize() + pd.Timedelta(days=1)), side='left'
+        )
+        return int(esquerda), int(direita)
+
+    def intervalo(self, inicio=None, fim=None):
+        esquerda, direita = self.posicoes(inicio, fim)
+        return self.df.iloc[esquerda:direita]
+
+    def ultimas(self, horas):
+        # Janela móvel que termina na medição mais recente, sem arredondar para o dia
+        if not len(self):
+            return self.df.iloc[0:0]
+        limite = self._carimbos[-1] - np.timedelta64(int(horas * 3600), 's')
+        return self.df.iloc[int(np.searchsorted(self._carimbos, limite, side='right')):]
+
+    def periodo(self, nome, agora=None):
+        # Datas de início e fim de um período nomeado da barra lateral
+        agora = agora or datetime.now()
+        return (agora - pd.Timedelta(days=PERIODOS[nome])).date(), agora.date()